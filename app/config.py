@@ -10,10 +10,30 @@ class Settings(BaseSettings):
 
     gemini_api_key: Optional[str] = None
     gemini_model: str = "gemini-2.5-flash"
+    gemini_fast_model: Optional[str] = "gemini-2.5-flash-lite"
+    router_fast_max_chars: int = 3000
+    router_fast_max_numeric_lines: int = 25
+    reextract_failed_pages: bool = True
     tesseract_cmd: Optional[str] = None
+    ocr_layout_mode: str = "table"
+    ocr_tile_height: int = 2000
+    ocr_tile_overlap: int = 80
+    page_dedup_max_distance: int = 8
+    page_dedup_max_pixel_difference: float = 6.0
     poppler_path: Optional[str] = None
     temp_dir: Path = Path("tmp")
+    shared_state_dir: Path = Path("tmp/shared")
+    cache_ttl_seconds: int = 86400
+    cache_max_bytes: int = 512 * 1024 * 1024
+    ocr_pool_size: int = 0
+    gemini_requests_per_minute: int = 0
     request_timeout_seconds: int = 30
+    max_document_bytes: int = 25 * 1024 * 1024
+    max_inflight_documents: int = 4
+    max_queued_pages: int = 64
+    admission_queue_timeout_seconds: float = 20.0
+    small_document_pages: int = 2
+    warm_up_timeout_seconds: float = 60.0
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
@@ -23,5 +43,6 @@ def get_settings() -> Settings:
     """Return cached settings instance."""
     settings = Settings()
     settings.temp_dir.mkdir(parents=True, exist_ok=True)
+    settings.shared_state_dir.mkdir(parents=True, exist_ok=True)
     return settings
 
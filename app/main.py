@@ -1,17 +1,64 @@
 from __future__ import annotations
 
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Awaitable
 
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+from app.config import get_settings
 from app.models.schemas import DocumentRequest, ExtractionResponse
-from app.services.pipeline import BillExtractionPipeline
+from app.services.admission import AdmissionRejected
+from app.services.fetcher import DocumentTooLarge
+from app.services.pipeline import BillExtractionPipeline, PipelineResult
+
+logger = logging.getLogger(__name__)
+
+
+async def _warm_up(app: FastAPI, timeout_seconds: float) -> None:
+    try:
+        await asyncio.wait_for(app.state.pipeline.warm_up(), timeout=timeout_seconds)
+    except asyncio.TimeoutError:
+        logger.warning("Pipeline warm-up timed out after %ss; serving cold", timeout_seconds)
+    except Exception:
+        logger.exception("Pipeline warm-up failed; serving cold")
+    app.state.ready = True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build the pipeline before serving so configuration errors fail start-up,
+    then warm it in the background; /health/ready stays 503 until warm-up
+    finishes or times out.
+    """
+    settings = get_settings()
+    app.state.ready = False
+    app.state.pipeline = await asyncio.to_thread(BillExtractionPipeline, settings)
+    warm_up = asyncio.create_task(_warm_up(app, settings.warm_up_timeout_seconds))
+    yield
+    warm_up.cancel()
+    await app.state.pipeline.aclose()
+
 
 app = FastAPI(
     title="Bill Extraction API",
     version="0.2.0",
     description="Extract line items, quantities, rates, and totals from invoice/bill documents.",
+    lifespan=lifespan,
 )
 
-pipeline = BillExtractionPipeline()
+
+def _get_pipeline() -> BillExtractionPipeline:
+    if not app.state.ready:
+        raise HTTPException(
+            status_code=503,
+            detail="Service is warming up, retry shortly.",
+            headers={"Retry-After": "5"},
+        )
+    return app.state.pipeline
 
 
 @app.get("/")
@@ -23,8 +70,10 @@ async def root():
         "status": "operational",
         "endpoints": {
             "extract": "/extract-bill-data",
+            "upload": "/extract-bill-data/upload",
             "docs": "/docs",
             "health": "/health",
+            "ready": "/health/ready",
         },
     }
 
@@ -35,6 +84,19 @@ async def health_check():
     return {"status": "healthy", "service": "bill-extraction-api"}
 
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness probe; returns 503 while warming up or saturated so load balancers route around it."""
+    if not app.state.ready:
+        return JSONResponse(status_code=503, content={"status": "starting"}, headers={"Retry-After": "5"})
+    admission = app.state.pipeline.admission.snapshot()
+    ready = not admission["saturated"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "saturated", "admission": admission},
+    )
+
+
 @app.post("/extract-bill-data", response_model=ExtractionResponse)
 async def extract_bill_data(payload: DocumentRequest) -> ExtractionResponse:
     """
@@ -47,14 +109,49 @@ async def extract_bill_data(payload: DocumentRequest) -> ExtractionResponse:
     4. Structure the data using LLM
     5. Return organized line items with token usage metrics
     """
+    pipeline = _get_pipeline()
+    return await _execute(pipeline.run(payload.document))
+
+
+@app.post("/extract-bill-data/upload", response_model=ExtractionResponse)
+async def extract_bill_data_upload(request: Request) -> ExtractionResponse:
+    """
+    Extract line items from a document sent in the request itself.
+
+    Accepts either multipart/form-data with the file in a `document` field, or
+    the raw file bytes as the body (e.g. `Content-Type: application/pdf`, with
+    an optional `X-Filename` header). This skips the URL download; size limits,
+    caching and admission are shared with /extract-bill-data. The body is read
+    as a stream in both cases, so oversized uploads are cut off while reading.
+    """
+    pipeline = _get_pipeline()
+    return await _execute(
+        pipeline.run_upload(
+            request.stream(),
+            filename=request.headers.get("x-filename"),
+            content_type=request.headers.get("content-type"),
+            content_length=request.headers.get("content-length"),
+        )
+    )
+
+
+async def _execute(run: Awaitable[PipelineResult]) -> ExtractionResponse:
     try:
-        result = await pipeline.run(payload.document)
+        result = await run
         return ExtractionResponse(
             is_success=True,
             data=result.data,
             token_usage=result.token_usage,
+            validation=result.validation,
         )
+    except AdmissionRejected as exc:
+        raise HTTPException(
+            status_code=exc.status_code,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except DocumentTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc)) from exc
     except Exception as exc:
         # Return a helpful error message to help debug issues
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from decimal import Decimal
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import AnyHttpUrl, BaseModel, Field, validator
 
@@ -31,6 +31,9 @@ class PageLineItems(BaseModel):
         None, description="Bill Detail | Final Bill | Pharmacy or other source label"
     )
     bill_items: List[BillItem] = Field(default_factory=list)
+    duplicate_of: Optional[str] = Field(
+        None, description="Page number this page duplicates; its items are reported on that page only"
+    )
 
 
 class ExtractionData(BaseModel):
@@ -38,16 +41,43 @@ class ExtractionData(BaseModel):
     total_item_count: int
 
 
+class TierTokenUsage(BaseModel):
+    model: str
+    calls: int = 0
+    total_tokens: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+
 class TokenUsage(BaseModel):
     total_tokens: int = 0
     input_tokens: int = 0
     output_tokens: int = 0
+    by_tier: Optional[Dict[str, TierTokenUsage]] = Field(
+        None, description="Token usage split by model tier (fast/strong)"
+    )
+
+
+class ValidationIssue(BaseModel):
+    page_no: str
+    check: str = Field(..., description="rate_quantity | page_total | duplicate_item")
+    message: str
+    item_name: Optional[str] = None
+
+
+class ValidationReport(BaseModel):
+    passed: bool
+    issues: List[ValidationIssue] = Field(default_factory=list)
+    reextracted_pages: List[str] = Field(
+        default_factory=list, description="Pages whose items were replaced by a re-extraction after failing validation"
+    )
 
 
 class ExtractionResponse(BaseModel):
     is_success: bool
     token_usage: Optional[TokenUsage] = None
     data: Optional[ExtractionData] = None
+    validation: Optional[ValidationReport] = None
     message: Optional[str] = None
 
 
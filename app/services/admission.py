@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Tuple
+
+
+class AdmissionRejected(Exception):
+    """Raised when a document cannot be admitted; carries the HTTP status and Retry-After hint."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Bounded admission in front of the OCR + LLM stages.
+
+    At most `max_inflight_documents` documents are processed at once. Further
+    documents wait in a queue capped at `max_queued_pages` pages and are
+    rejected once they have waited `queue_timeout_seconds`, so a spike fails
+    fast with a Retry-After hint instead of slowing every request until they
+    all time out. Documents of up to `small_document_pages` pages are served
+    from a priority lane ahead of larger ones.
+    """
+
+    def __init__(
+        self,
+        max_inflight_documents: int = 4,
+        max_queued_pages: int = 64,
+        queue_timeout_seconds: float = 20.0,
+        small_document_pages: int = 2,
+    ) -> None:
+        self._max_inflight = max_inflight_documents
+        self._max_queued_pages = max_queued_pages
+        self._queue_timeout_seconds = queue_timeout_seconds
+        self._small_document_pages = small_document_pages
+        self._in_flight = 0
+        self._queued_pages = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        # Moving average of time spent holding a slot, used for Retry-After.
+        self._service_seconds = 5.0
+
+    def check_capacity(self) -> None:
+        """Reject up front, before any download or rendering, when the queue is already full."""
+        if self._in_flight >= self._max_inflight and self._queued_pages >= self._max_queued_pages:
+            raise AdmissionRejected(
+                "Server is at capacity, retry later.", status_code=429, retry_after=self.retry_after()
+            )
+
+    @asynccontextmanager
+    async def admit(self, page_count: int) -> AsyncIterator[None]:
+        await self._acquire(page_count)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * elapsed
+            self._release()
+
+    def retry_after(self) -> int:
+        backlog = len(self._waiters) + 1
+        return max(1, math.ceil(self._service_seconds * backlog / self._max_inflight))
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "in_flight_documents": self._in_flight,
+            "max_in_flight_documents": self._max_inflight,
+            "queued_documents": len(self._waiters),
+            "queued_pages": self._queued_pages,
+            "max_queued_pages": self._max_queued_pages,
+            "saturated": self._in_flight >= self._max_inflight,
+        }
+
+    async def _acquire(self, page_count: int) -> None:
+        if self._in_flight < self._max_inflight and not self._waiters:
+            self._in_flight += 1
+            return
+        if self._queued_pages + page_count > self._max_queued_pages:
+            raise AdmissionRejected(
+                "Server is at capacity, retry later.", status_code=429, retry_after=self.retry_after()
+            )
+
+        lane = 0 if page_count <= self._small_document_pages else 1
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        entry = (lane, next(self._sequence), future)
+        heapq.heappush(self._waiters, entry)
+        self._queued_pages += page_count
+        try:
+            # asyncio.wait rather than wait_for: on Python < 3.12 wait_for swallows
+            # a cancellation that lands after the slot was handed over.
+            done, _ = await asyncio.wait((future,), timeout=self._queue_timeout_seconds)
+        except asyncio.CancelledError:
+            # A slot handed over just before cancellation must be passed on.
+            if not self._abandon(entry):
+                self._release()
+            raise
+        finally:
+            self._queued_pages -= page_count
+        if not done and self._abandon(entry):
+            raise AdmissionRejected(
+                "Timed out waiting for processing capacity.",
+                status_code=503,
+                retry_after=self.retry_after(),
+            )
+
+    def _abandon(self, entry: Tuple[int, int, asyncio.Future]) -> bool:
+        """Drop a waiter from the queue; returns False if it already owns a slot."""
+        future = entry[2]
+        if future.done():
+            return False
+        future.cancel()
+        self._waiters.remove(entry)
+        heapq.heapify(self._waiters)
+        return True
+
+    def _release(self) -> None:
+        # Hand the slot straight to the next waiter so in-flight count stays exact.
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._in_flight -= 1
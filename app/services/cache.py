@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Optional
+
+
+class SharedCache:
+    """
+    Key/value cache in a local SQLite file shared by every worker process.
+
+    Each uvicorn worker opens the same database, so a page or document that was
+    processed by one worker is a cache hit for all of them. Values are stored
+    as text (JSON or OCR output) under a namespace and expire after
+    `ttl_seconds`; a TTL of 0 disables the cache entirely.
+
+    Expired rows are deleted every `purge_every` writes (and on start-up). If
+    the stored values then still exceed `max_bytes`, the oldest entries are
+    dropped as well, so long backfills cannot grow the file without bound.
+    SQLite reuses the freed pages; the file itself is not shrunk.
+    """
+
+    def __init__(
+        self, path: Path, ttl_seconds: int = 86400, max_bytes: int = 0, purge_every: int = 100
+    ) -> None:
+        self._path = path
+        self._ttl_seconds = ttl_seconds
+        self._max_bytes = max_bytes
+        self._purge_every = purge_every
+        self._writes = 0
+        if self.enabled:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                    "created REAL NOT NULL, PRIMARY KEY (namespace, key))"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS cache_created ON cache (created)")
+            self.purge()
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM cache WHERE namespace = ? AND key = ? AND created >= ?",
+                (namespace, key, time.time() - self._ttl_seconds),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace: str, key: str, value: str) -> None:
+        if not self.enabled:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, created) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, time.time()),
+            )
+        # Counted per process; with several workers the purge simply runs more often.
+        self._writes += 1
+        if self._writes % self._purge_every == 0:
+            self.purge()
+
+    def purge(self) -> None:
+        """Delete expired entries, then the oldest ones beyond `max_bytes`."""
+        if not self.enabled:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM cache WHERE created < ?", (time.time() - self._ttl_seconds,))
+            if self._max_bytes > 0:
+                conn.execute(
+                    "DELETE FROM cache WHERE rowid IN ("
+                    "SELECT rowid FROM (SELECT rowid, SUM(LENGTH(CAST(value AS BLOB))) "
+                    "OVER (ORDER BY created DESC, rowid DESC) AS kept FROM cache) WHERE kept > ?)",
+                    (self._max_bytes,),
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._path.as_posix(), timeout=30)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import os
+import random
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class HostSlotPool:
+    """
+    Host-wide counting semaphore built from `size` lock files.
+
+    Every worker process (and every thread within it) must hold a slot while
+    running OCR, so the total number of concurrent Tesseract processes on the
+    host never exceeds `size` no matter how many uvicorn workers are running.
+    """
+
+    def __init__(self, lock_dir: Path, size: int, name: str = "ocr") -> None:
+        lock_dir.mkdir(parents=True, exist_ok=True)
+        self._paths = [lock_dir / f"{name}-slot-{index}.lock" for index in range(max(size, 1))]
+
+    @property
+    def size(self) -> int:
+        return len(self._paths)
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        while True:
+            # Start at a random slot so waiters don't all contend for slot 0.
+            offset = random.randrange(len(self._paths))
+            for index in range(len(self._paths)):
+                path = self._paths[(offset + index) % len(self._paths)]
+                fd = os.open(path, os.O_CREAT | os.O_RDWR)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    continue
+                try:
+                    yield
+                finally:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                    os.close(fd)
+                return
+            time.sleep(0.05)
+
+
+class SharedRateLimiter:
+    """
+    Token bucket stored in SQLite so all worker processes share one request budget.
+
+    Used to keep the combined Gemini request rate of every worker on the host
+    under `requests_per_minute`. A rate of 0 disables limiting. Waiting is done
+    with `asyncio.sleep`, so a throttled request never parks a thread from the
+    event loop's default executor.
+    """
+
+    def __init__(self, db_path: Path, name: str, requests_per_minute: int, burst: int | None = None) -> None:
+        self._db_path = db_path
+        self._name = name
+        self._rate_per_second = requests_per_minute / 60
+        self._capacity = float(burst or max(1, requests_per_minute // 6))
+        if self._rate_per_second > 0:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS rate_limits ("
+                    "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+                )
+
+    async def acquire(self) -> None:
+        """Wait until a request token is available."""
+        if self._rate_per_second <= 0:
+            return
+        while True:
+            # The SQLite transaction is short but may wait on another worker's lock.
+            wait_seconds = await asyncio.to_thread(self._try_acquire)
+            if wait_seconds <= 0:
+                return
+            await asyncio.sleep(wait_seconds)
+
+    def _try_acquire(self) -> float:
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT tokens, updated FROM rate_limits WHERE name = ?", (self._name,)
+            ).fetchone()
+            tokens = self._capacity
+            if row:
+                tokens = min(self._capacity, row[0] + (now - row[1]) * self._rate_per_second)
+            wait_seconds = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait_seconds = (1 - tokens) / self._rate_per_second
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limits (name, tokens, updated) VALUES (?, ?, ?)",
+                (self._name, tokens, now),
+            )
+            conn.commit()
+        return wait_seconds
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self._db_path.as_posix(), timeout=30, isolation_level=None)
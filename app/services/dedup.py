@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Sequence
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+
+@dataclass
+class _PageSignature:
+    page_no: int
+    dhash: int
+    aspect: float
+    thumbnail: Image.Image
+
+
+class PageDeduplicator:
+    """
+    Detects identical or near-identical pages within a single document.
+
+    Scanned bills frequently include the same page twice (re-scans, carbon
+    copies). Each page is reduced to a difference hash (dHash); a page whose
+    hash is within `max_distance` bits of an earlier page is a candidate
+    duplicate. Because pages printed on the same table template can hash
+    closely, a candidate is only collapsed if the mean absolute difference of
+    contrast-normalised 64x64 grayscale thumbnails is also at most
+    `max_pixel_difference` (0-255).
+    Confirmed duplicates are mapped to the earlier, canonical page so OCR and
+    LLM work is only done once.
+    """
+
+    def __init__(
+        self, max_distance: int = 8, hash_size: int = 16, max_pixel_difference: float = 6.0
+    ) -> None:
+        self._max_distance = max_distance
+        self._hash_size = hash_size
+        self._max_pixel_difference = max_pixel_difference
+
+    def find_duplicates(self, images: Sequence[Image.Image]) -> Dict[int, int]:
+        """Return a mapping of duplicate page number -> canonical page number (1-indexed)."""
+        if self._max_distance < 0 or len(images) < 2:
+            return {}
+
+        duplicates: Dict[int, int] = {}
+        canonical: List[_PageSignature] = []
+        for page_no, image in enumerate(images, start=1):
+            # Convert once; both signatures are computed from the grayscale page.
+            gray = image.convert("L")
+            signature = _PageSignature(
+                page_no=page_no,
+                dhash=self._dhash(gray),
+                aspect=image.width / image.height if image.height else 0.0,
+                thumbnail=self._thumbnail(gray),
+            )
+            for candidate in canonical:
+                if abs(signature.aspect - candidate.aspect) > 0.05:
+                    continue
+                if bin(signature.dhash ^ candidate.dhash).count("1") > self._max_distance:
+                    continue
+                if self.pixel_difference(signature.thumbnail, candidate.thumbnail) <= self._max_pixel_difference:
+                    duplicates[page_no] = candidate.page_no
+                    break
+            else:
+                canonical.append(signature)
+        return duplicates
+
+    @staticmethod
+    def pixel_difference(first: Image.Image, second: Image.Image) -> float:
+        """Mean absolute difference between two equally sized grayscale thumbnails."""
+        from PIL import ImageChops, ImageStat
+
+        return ImageStat.Stat(ImageChops.difference(first, second)).mean[0]
+
+    @staticmethod
+    def _thumbnail(gray: Image.Image) -> Image.Image:
+        from PIL import Image, ImageOps
+
+        # Autocontrast so a darker or lighter re-scan of the same page still matches.
+        return ImageOps.autocontrast(gray.resize((64, 64), Image.Resampling.BILINEAR))
+
+    def _dhash(self, gray: Image.Image) -> int:
+        from PIL import Image
+
+        size = self._hash_size
+        reduced = gray.resize((size + 1, size), Image.Resampling.BILINEAR)
+        pixels = list(reduced.getdata())
+        value = 0
+        for row in range(size):
+            offset = row * (size + 1)
+            for col in range(size):
+                value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+        return value
@@ -1,10 +1,11 @@
 from __future__ import annotations
 
+from io import BytesIO
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from pdf2image import convert_from_path
-from PIL import Image
+if TYPE_CHECKING:
+    from PIL import Image
 
 SUPPORTED_IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".webp"}
 
@@ -20,9 +21,22 @@ class DocumentProcessor:
         if suffix == ".pdf":
             return self._pdf_to_images(file_path)
         if suffix in SUPPORTED_IMAGE_EXTENSIONS:
+            from PIL import Image
+
             return [Image.open(file_path)]
         raise ValueError(f"Unsupported document type: {suffix}")
 
     def _pdf_to_images(self, file_path: Path) -> List[Image.Image]:
+        from pdf2image import convert_from_path
+
         return convert_from_path(file_path.as_posix(), poppler_path=self._poppler_path)
 
+    def warm_up(self) -> None:
+        """Import Pillow/pdf2image and render a one-page PDF so Poppler is loaded before traffic."""
+        from pdf2image import convert_from_bytes
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new("RGB", (32, 32), "white").save(buffer, format="PDF")
+        convert_from_bytes(buffer.getvalue(), poppler_path=self._poppler_path)
+
@@ -2,59 +2,153 @@ from __future__ import annotations
 
 import mimetypes
 import io
-try:
-    import magic
-except Exception:
-    magic = None
 import uuid
 from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator
 
-import httpx
+from app.services.uploads import MultipartDocumentReader
+
+if TYPE_CHECKING:
+    import httpx
+
+_GENERIC_CONTENT_TYPES = ("application/octet-stream", "binary/octet-stream")
+
+
+class DocumentTooLarge(ValueError):
+    """Raised when a downloaded or uploaded document exceeds the configured size limit."""
+
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(f"Document exceeds the maximum size of {max_bytes} bytes.")
+        self.max_bytes = max_bytes
 
 
 class DocumentFetcher:
-    """Download remote documents to a temporary directory for downstream processing."""
+    """Download remote (or accept uploaded) documents into a temporary directory for downstream processing."""
 
-    def __init__(self, temp_dir: Path, timeout_seconds: int = 30) -> None:
+    def __init__(
+        self, temp_dir: Path, timeout_seconds: int = 30, max_bytes: int = 25 * 1024 * 1024
+    ) -> None:
         self._temp_dir = temp_dir
         self._timeout_seconds = timeout_seconds
+        self._max_bytes = max_bytes
+        self._client: httpx.AsyncClient | None = None
+
+    async def warm_up(self) -> None:
+        """Create the pooled HTTP client ahead of the first download."""
+        self._get_client()
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # One pooled client per fetcher keeps connections and TLS sessions warm
+        # across requests instead of re-handshaking for every document.
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=self._timeout_seconds, follow_redirects=True)
+        return self._client
 
     async def fetch(self, url: str) -> Path:
         """Download the document located at `url` to a temporary file."""
-        async with httpx.AsyncClient(
-            timeout=self._timeout_seconds, follow_redirects=True
-        ) as client:
-            response = await client.get(url)
+        client = self._get_client()
+        async with client.stream("GET", url) as response:
             response.raise_for_status()
+            self._check_declared_size(response.headers.get("content-length"))
+            content = await self._read_limited(response.aiter_bytes())
             content_type = response.headers.get("content-type")
+        return self._store(url, content, content_type)
+
+    async def receive(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str | None = None,
+        content_type: str | None = None,
+        content_length: str | None = None,
+    ) -> Path:
+        """
+        Persist a directly uploaded document, applying the same size limits as
+        `fetch`. Multipart bodies are parsed as a stream and only the
+        `document` field is kept. Because upload clients often send a generic
+        or wrong Content-Type, the bytes are sniffed before the header is used.
+        """
+        self._check_declared_size(content_length)
+        if content_type and content_type.startswith("multipart/form-data"):
+            reader = MultipartDocumentReader(chunks, content_type)
+            await reader.start()
+            chunks, filename, content_type = reader.chunks(), filename or reader.filename, reader.content_type
+        content = await self._read_limited(chunks)
+        if not content:
+            raise ValueError("Uploaded document is empty.")
+        return self._store(filename or "", content, content_type, sniff_first=True)
 
-            # If content-type is generic or missing, try to detect from bytes
-            if not content_type or content_type in ("application/octet-stream", "binary/octet-stream"):
-                detected_type = None
-                # First try python-magic if installed
-                if magic:
-                    try:
-                        detected_type = magic.from_buffer(response.content, mime=True)
-                    except Exception:
-                        detected_type = None
-
-                # Fall back to simple checks on the first bytes
-                if not detected_type:
-                    head = response.content[:16]
-                    if head.startswith(b"%PDF"):
-                        detected_type = "application/pdf"
-                    elif head.startswith(b"\x89PNG"):
-                        detected_type = "image/png"
-                    elif head[0:2] in (b"\xff\xd8", b"\xff\xd9"):
-                        detected_type = "image/jpeg"
-
-                if detected_type:
-                    content_type = detected_type
-
-            target_path = self._temp_dir / self._build_filename(url, content_type)
-            target_path.write_bytes(response.content)
+    def _check_declared_size(self, content_length: str | None) -> None:
+        if content_length and content_length.isdigit() and int(content_length) > self._max_bytes:
+            raise DocumentTooLarge(self._max_bytes)
+
+    async def _read_limited(self, chunks: AsyncIterator[bytes]) -> bytes:
+        buffer = bytearray()
+        async for chunk in chunks:
+            buffer.extend(chunk)
+            if len(buffer) > self._max_bytes:
+                raise DocumentTooLarge(self._max_bytes)
+        return bytes(buffer)
+
+    def _store(
+        self, name_hint: str, content: bytes, content_type: str | None, sniff_first: bool = False
+    ) -> Path:
+        if sniff_first:
+            # Upload clients often send a wrong header (curl --data-binary sends
+            # x-www-form-urlencoded), so a known file signature takes precedence.
+            content_type = self._signature_type(content) or content_type
+        content_type = self._sniff_content_type(content, content_type)
+        target_path = self._temp_dir / self._build_filename(name_hint, content_type)
+        target_path.write_bytes(content)
         return target_path
 
+    @staticmethod
+    def _sniff_content_type(content: bytes, content_type: str | None) -> str | None:
+        if content_type:
+            content_type = content_type.split(";")[0].strip()
+
+        # If content-type is generic or missing, try to detect from bytes
+        if not content_type or content_type in _GENERIC_CONTENT_TYPES:
+            detected_type = None
+            # First try python-magic if installed
+            try:
+                import magic
+            except Exception:
+                magic = None
+            if magic:
+                try:
+                    detected_type = magic.from_buffer(content, mime=True)
+                except Exception:
+                    detected_type = None
+                # libmagic answers octet-stream when it cannot tell; that is not a detection.
+                if detected_type in _GENERIC_CONTENT_TYPES:
+                    detected_type = None
+
+            # Fall back to simple checks on the first bytes
+            if not detected_type:
+                detected_type = DocumentFetcher._signature_type(content)
+
+            if detected_type:
+                content_type = detected_type
+        return content_type
+
+    @staticmethod
+    def _signature_type(content: bytes) -> str | None:
+        head = content[:16]
+        if head.startswith(b"%PDF"):
+            return "application/pdf"
+        if head.startswith(b"\x89PNG"):
+            return "image/png"
+        if head[0:2] in (b"\xff\xd8", b"\xff\xd9"):
+            return "image/jpeg"
+        return None
+
     def _build_filename(self, url: str, content_type: str | None) -> str:
         extension = self._infer_extension(url, content_type) or ".bin"
         return f"{uuid.uuid4().hex}{extension}"
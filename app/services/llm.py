@@ -5,15 +5,16 @@ import json
 from dataclasses import dataclass
 from typing import Dict, List, Sequence, Tuple
 
-import google.generativeai as genai
-
 from app.models.schemas import LLMPageExtraction
+from app.services.coordination import SharedRateLimiter
+from app.services.routing import FAST_TIER, STRONG_TIER, GeminiBackend, ModelBackend, ModelRouter
 
 
 @dataclass
 class _LLMCallResult:
     page: LLMPageExtraction
-    usage: Dict[str, int]
+    # One (tier, usage) entry per model call made for the page, including escalations.
+    calls: List[Tuple[str, Dict[str, int]]]
 
 
 class LLMExtractionService:
@@ -26,41 +27,127 @@ class LLMExtractionService:
     - Confusing dates/invoice numbers with amounts
     - Double-counting items
     - Missing legitimate line items
+
+    Each page is routed to a model tier by `ModelRouter`: easy pages go to the
+    fast tier, and pages where the fast tier found no items are re-run on the
+    strong tier. Backends are pluggable, so tests can pass stubs
+    through `backends` instead of configuring Gemini.
     """
 
-    def __init__(self, api_key: str, model: str = "gemini-1.5-pro") -> None:
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY is not configured.")
-        genai.configure(api_key=api_key)
-        self._model = genai.GenerativeModel(model_name=model)
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str = "gemini-1.5-pro",
+        rate_limiter: SharedRateLimiter | None = None,
+        fast_model: str | None = None,
+        router: ModelRouter | None = None,
+        backends: Dict[str, ModelBackend] | None = None,
+    ) -> None:
+        if backends is None:
+            if not api_key:
+                raise ValueError("GEMINI_API_KEY is not configured.")
+            backends = {STRONG_TIER: GeminiBackend(api_key=api_key, model=model)}
+            if fast_model and fast_model != model:
+                backends[FAST_TIER] = GeminiBackend(api_key=api_key, model=fast_model)
+        if not backends:
+            raise ValueError("At least one model backend is required.")
+        self._backends = backends
+        self._router = router or ModelRouter()
+        self._rate_limiter = rate_limiter
+
+    def warm_up(self) -> None:
+        for backend in self._backends.values():
+            backend.warm_up()
 
     async def extract_pages(
         self, pages: Sequence[tuple[int, str]]
-    ) -> Tuple[List[LLMPageExtraction], Dict[str, int]]:
+    ) -> Tuple[List[LLMPageExtraction], Dict[str, object]]:
         tasks = [self._extract_single(page_no, text) for page_no, text in pages if text]
         if not tasks:
-            return [], {"total_tokens": 0, "input_tokens": 0, "output_tokens": 0}
+            return [], {"total_tokens": 0, "input_tokens": 0, "output_tokens": 0, "by_tier": {}}
         responses = await asyncio.gather(*tasks)
-        usage_totals = self._aggregate_usage(result.usage for result in responses)
+        calls = [call for result in responses for call in result.calls]
+        usage_totals = self._aggregate_usage([usage for _, usage in calls])
+        usage_totals["by_tier"] = self._usage_by_tier(calls)
         return [result.page for result in responses], usage_totals
 
+    async def reextract_pages(
+        self, pages: Sequence[Tuple[int, str, Sequence[str]]]
+    ) -> Tuple[List[LLMPageExtraction], Dict[str, object]]:
+        """
+        Re-run only the given pages on the tier the router picks for a page that
+        failed validation, with a follow-up prompt listing the problems found in
+        the first answer.
+        """
+        tiers = [self._resolve_tier(self._router.choose(text, failed_validation=True)) for _, text, _ in pages]
+        results = await asyncio.gather(
+            *(
+                self._dispatch(tier, page_no, text, problems)
+                for tier, (page_no, text, problems) in zip(tiers, pages)
+            )
+        )
+        calls = [(tier, usage) for tier, (_, usage) in zip(tiers, results)]
+        usage_totals = self._aggregate_usage([usage for _, usage in calls])
+        usage_totals["by_tier"] = self._usage_by_tier(calls)
+        return [page for page, _ in results], usage_totals
+
+    @staticmethod
+    def merge_usage(first: Dict[str, object], second: Dict[str, object]) -> Dict[str, object]:
+        merged = LLMExtractionService._aggregate_usage([first, second])
+        by_tier: Dict[str, Dict[str, object]] = {}
+        for usage in (first, second):
+            for tier, entry in (usage.get("by_tier") or {}).items():
+                target = by_tier.setdefault(tier, {"model": entry.get("model", "")})
+                for key in ("calls", "total_tokens", "input_tokens", "output_tokens"):
+                    target[key] = target.get(key, 0) + entry.get(key, 0)
+        merged["by_tier"] = by_tier
+        return merged
+
     async def _extract_single(self, page_no: int, text: str) -> _LLMCallResult:
-        return await asyncio.to_thread(self._call_model, page_no, text)
+        tier = self._resolve_tier(self._router.choose(text))
+        page, usage = await self._dispatch(tier, page_no, text)
+        calls = [(tier, usage)]
+        if (
+            tier != STRONG_TIER
+            and STRONG_TIER in self._backends
+            and self._router.needs_escalation(page, text)
+        ):
+            page, usage = await self._dispatch(STRONG_TIER, page_no, text)
+            calls.append((STRONG_TIER, usage))
+        return _LLMCallResult(page=page, calls=calls)
 
-    def _call_model(self, page_no: int, text: str) -> _LLMCallResult:
-        prompt = self._build_prompt(page_no, text)
-        response = self._model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"},
-        )
-        message = response.text if hasattr(response, "text") else ""
+    async def _dispatch(
+        self, tier: str, page_no: int, text: str, review_notes: Sequence[str] = ()
+    ) -> Tuple[LLMPageExtraction, Dict[str, int]]:
+        # Wait for rate budget on the event loop; only the model call itself
+        # occupies an executor thread.
+        if self._rate_limiter:
+            await self._rate_limiter.acquire()
+        return await asyncio.to_thread(self._call_tier, tier, page_no, text, review_notes)
+
+    def _resolve_tier(self, tier: str) -> str:
+        if tier in self._backends:
+            return tier
+        return STRONG_TIER if STRONG_TIER in self._backends else next(iter(self._backends))
+
+    def _call_tier(
+        self, tier: str, page_no: int, text: str, review_notes: Sequence[str] = ()
+    ) -> Tuple[LLMPageExtraction, Dict[str, int]]:
+        prompt = self._build_prompt(page_no, text, review_notes)
+        message, usage = self._backends[tier].generate(prompt)
         payload = json.loads(message or "{}")
         payload.setdefault("page_no", page_no)
-        usage = self._extract_usage(response)
-        return _LLMCallResult(page=LLMPageExtraction.model_validate(payload), usage=usage)
+        return LLMPageExtraction.model_validate(payload), usage
 
     @staticmethod
-    def _build_prompt(page_no: int, text: str) -> str:
+    def _build_prompt(page_no: int, text: str, review_notes: Sequence[str] = ()) -> str:
+        review = ""
+        if review_notes:
+            review = (
+                "REVIEW: A previous extraction of this page failed these checks:\n"
+                + "".join(f"- {note}\n" for note in review_notes)
+                + "Re-read the OCR text for those rows and return the corrected, complete item list for this page.\n\n"
+            )
         return (
             "You are an expert billing analyst extracting line items from medical/pharmacy bills.\n\n"
             "TASK: Extract EVERY individual purchasable line item (services, medications, supplies, etc.) from the OCR text below.\n\n"
@@ -109,21 +196,13 @@ class LLMExtractionService:
             "}\n\n"
             "IMPORTANT: Every item MUST have a valid item_amount as a number representing currency. If you cannot determine the monetary amount, do not include that item.\n\n"
             f"PAGE NUMBER: {page_no}\n\n"
+            "The OCR text may be laid out as table rows, one per line, with columns separated by ' | '. "
+            "Keep each item's name, rate, quantity and amount from the same row.\n\n"
             f"OCR TEXT:\n{text}\n\n"
+            f"{review}"
             "Extract all line items now:"
         )
 
-    @staticmethod
-    def _extract_usage(response: object) -> Dict[str, int]:
-        usage = getattr(response, "usage_metadata", None)
-        if not usage:
-            return {"total_tokens": 0, "input_tokens": 0, "output_tokens": 0}
-        return {
-            "total_tokens": getattr(usage, "total_token_count", 0) or 0,
-            "input_tokens": getattr(usage, "prompt_token_count", 0) or 0,
-            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
-        }
-
     @staticmethod
     def _aggregate_usage(usages: Sequence[Dict[str, int]]) -> Dict[str, int]:
         totals = {"total_tokens": 0, "input_tokens": 0, "output_tokens": 0}
@@ -132,3 +211,20 @@ class LLMExtractionService:
                 totals[key] += usage.get(key, 0)
         return totals
 
+    def _usage_by_tier(self, calls: Sequence[Tuple[str, Dict[str, int]]]) -> Dict[str, Dict[str, object]]:
+        by_tier: Dict[str, Dict[str, object]] = {}
+        for tier, usage in calls:
+            entry = by_tier.setdefault(
+                tier,
+                {
+                    "model": self._backends[tier].model_name,
+                    "calls": 0,
+                    "total_tokens": 0,
+                    "input_tokens": 0,
+                    "output_tokens": 0,
+                },
+            )
+            entry["calls"] += 1
+            for key in ("total_tokens", "input_tokens", "output_tokens"):
+                entry[key] += usage.get(key, 0)
+        return by_tier
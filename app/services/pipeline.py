@@ -1,53 +1,263 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import logging
+import os
 from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-from app.config import get_settings
-from app.models.schemas import BillItem, ExtractionData, LLMPageExtraction, PageLineItems, TokenUsage
+from app.config import Settings, get_settings
+from app.models.schemas import (
+    BillItem,
+    ExtractionData,
+    LLMPageExtraction,
+    PageLineItems,
+    TokenUsage,
+    ValidationReport,
+)
+from app.services.admission import AdmissionController
+from app.services.cache import SharedCache
+from app.services.coordination import HostSlotPool, SharedRateLimiter
+from app.services.dedup import PageDeduplicator
 from app.services.document_processor import DocumentProcessor
 from app.services.fetcher import DocumentFetcher
 from app.services.llm import LLMExtractionService
 from app.services.ocr import OCRService
+from app.services.routing import ModelRouter
+from app.services.validation import RATE_QUANTITY_CHECK, ExtractionValidator, rate_quantity_mismatches
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class PipelineResult:
     data: ExtractionData
     token_usage: TokenUsage
+    validation: Optional[ValidationReport] = None
 
 
 class BillExtractionPipeline:
-    """End-to-end orchestrator for bill line-item extraction."""
+    """
+    End-to-end orchestrator for bill line-item extraction.
+
+    Safe to instantiate once per uvicorn worker: the result/OCR cache, the OCR
+    slot pool and the Gemini rate budget all live under `shared_state_dir` and
+    are shared by every worker process on the host.
+    """
 
-    def __init__(self) -> None:
-        settings = get_settings()
+    def __init__(self, settings: Settings | None = None) -> None:
+        settings = settings or get_settings()
+        state_dir = settings.shared_state_dir
+        self._cache = SharedCache(
+            state_dir / "cache.sqlite3",
+            ttl_seconds=settings.cache_ttl_seconds,
+            max_bytes=settings.cache_max_bytes,
+        )
+        self._cache_namespace = (
+            f"document:{settings.ocr_layout_mode}:{settings.gemini_model}:{settings.gemini_fast_model}"
+        )
         self._fetcher = DocumentFetcher(
-            temp_dir=settings.temp_dir, timeout_seconds=settings.request_timeout_seconds
+            temp_dir=settings.temp_dir,
+            timeout_seconds=settings.request_timeout_seconds,
+            max_bytes=settings.max_document_bytes,
         )
         self._processor = DocumentProcessor(poppler_path=settings.poppler_path)
-        self._ocr = OCRService(tesseract_cmd=settings.tesseract_cmd)
+        self._deduplicator = PageDeduplicator(
+            max_distance=settings.page_dedup_max_distance,
+            max_pixel_difference=settings.page_dedup_max_pixel_difference,
+        )
+        self._ocr = OCRService(
+            tesseract_cmd=settings.tesseract_cmd,
+            layout_mode=settings.ocr_layout_mode,
+            tile_height=settings.ocr_tile_height,
+            tile_overlap=settings.ocr_tile_overlap,
+            slots=HostSlotPool(state_dir / "locks", size=settings.ocr_pool_size or os.cpu_count() or 1),
+            cache=self._cache,
+        )
         self._llm = (
-            LLMExtractionService(api_key=settings.gemini_api_key, model=settings.gemini_model)
+            LLMExtractionService(
+                api_key=settings.gemini_api_key,
+                model=settings.gemini_model,
+                fast_model=settings.gemini_fast_model,
+                router=ModelRouter(
+                    fast_max_chars=settings.router_fast_max_chars,
+                    fast_max_numeric_lines=settings.router_fast_max_numeric_lines,
+                ),
+                rate_limiter=SharedRateLimiter(
+                    state_dir / "rate_limits.sqlite3",
+                    name="gemini",
+                    requests_per_minute=settings.gemini_requests_per_minute,
+                ),
+            )
             if settings.gemini_api_key
             else None
         )
+        self._validator = ExtractionValidator()
+        self._reextract_failed_pages = settings.reextract_failed_pages
+        self._admission = AdmissionController(
+            max_inflight_documents=settings.max_inflight_documents,
+            max_queued_pages=settings.max_queued_pages,
+            queue_timeout_seconds=settings.admission_queue_timeout_seconds,
+            small_document_pages=settings.small_document_pages,
+        )
+
+    @property
+    def admission(self) -> AdmissionController:
+        return self._admission
+
+    async def warm_up(self) -> None:
+        """
+        Pay one-off start-up costs before serving traffic: HTTP pool creation,
+        a dummy PDF render, a Tesseract smoke run (warms the OS file cache) and
+        the first Gemini connection. A failing step is logged and skipped; the
+        caller bounds the whole warm-up with a timeout.
+        """
+        steps = [
+            ("http", self._fetcher.warm_up()),
+            ("render", asyncio.to_thread(self._processor.warm_up)),
+            ("ocr", asyncio.to_thread(self._ocr.warm_up)),
+        ]
+        if self._llm:
+            steps.append(("llm", asyncio.to_thread(self._llm.warm_up)))
+        results = await asyncio.gather(*(step for _, step in steps), return_exceptions=True)
+        for (name, _), result in zip(steps, results):
+            if isinstance(result, Exception):
+                logger.warning("Warm-up step %s failed: %s", name, result)
+
+    async def aclose(self) -> None:
+        await self._fetcher.aclose()
 
     async def run(self, document_url: str) -> PipelineResult:
+        self._admission.check_capacity()
         local_path = await self._fetcher.fetch(str(document_url))
-        images = self._processor.to_images(local_path)
-        ocr_pages = self._ocr.run(images)
+        return await self._process(local_path)
+
+    async def run_upload(
+        self,
+        chunks: AsyncIterator[bytes],
+        filename: str | None = None,
+        content_type: str | None = None,
+        content_length: str | None = None,
+    ) -> PipelineResult:
+        """Process a document whose bytes (raw or multipart) were sent directly instead of as a URL."""
+        self._admission.check_capacity()
+        local_path = await self._fetcher.receive(
+            chunks, filename=filename, content_type=content_type, content_length=content_length
+        )
+        try:
+            return await self._process(local_path)
+        finally:
+            # Uploads have no source to re-fetch from and results are cached by
+            # content hash, so the stored copy is only needed while processing.
+            local_path.unlink(missing_ok=True)
+
+    async def run_file(self, local_path: Path, content_hash: str | None = None) -> PipelineResult:
+        """
+        Process a document already on local disk (bulk/offline runs). Callers
+        that have already hashed the file pass its SHA-256 as `content_hash`.
+        """
+        return await self._process(local_path, content_hash)
+
+    async def _process(self, local_path: Path, cache_key: str | None = None) -> PipelineResult:
+        # Hashing and SQLite access can block (large files, write-lock contention
+        # between workers), so keep them off the event loop.
+        if cache_key is None:
+            cache_key = await asyncio.to_thread(self._file_hash, local_path)
+        cached = await asyncio.to_thread(self._cache.get, self._cache_namespace, cache_key)
+        if cached is not None:
+            # Served from the shared cache, so no tokens were spent on this request.
+            return PipelineResult(data=ExtractionData.model_validate_json(cached), token_usage=TokenUsage())
 
-        if not ocr_pages:
-            raise ValueError("OCR returned no text for the provided document.")
+        images = await asyncio.to_thread(self._processor.to_images, local_path)
+        duplicates = await asyncio.to_thread(self._deduplicator.find_duplicates, images)
+        canonical = [
+            (page_no, image)
+            for page_no, image in enumerate(images, start=1)
+            if page_no not in duplicates
+        ]
 
         if not self._llm:
             raise ValueError("LLM extractor is not configured. Set GEMINI_API_KEY.")
 
-        llm_pages, usage = await self._llm.extract_pages(ocr_pages)
-        extraction = self._build_response(llm_pages)
-        return PipelineResult(data=extraction, token_usage=TokenUsage(**usage))
+        async with self._admission.admit(len(canonical)):
+            ocr_pages = await asyncio.to_thread(
+                self._ocr.run,
+                [image for _, image in canonical],
+                [page_no for page_no, _ in canonical],
+            )
+            if not ocr_pages:
+                raise ValueError("OCR returned no text for the provided document.")
+            llm_pages, usage = await self._llm.extract_pages(ocr_pages)
+            llm_pages, usage, validation = await self._validate(llm_pages, usage, dict(ocr_pages))
+        extraction = self._build_response(llm_pages, duplicates)
+        await asyncio.to_thread(
+            self._cache.set, self._cache_namespace, cache_key, extraction.model_dump_json()
+        )
+        return PipelineResult(data=extraction, token_usage=TokenUsage(**usage), validation=validation)
+
+    @staticmethod
+    def _file_hash(path: Path) -> str:
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    async def _validate(
+        self, pages: List[LLMPageExtraction], usage: Dict[str, object], ocr_text: Dict[int, str]
+    ) -> Tuple[List[LLMPageExtraction], Dict[str, object], ValidationReport]:
+        """
+        Check the extracted rows locally and re-extract only the pages whose
+        rows fail rate x quantity, instead of re-running the whole document.
+        A retried page replaces the original only if it has fewer failing
+        rows and at least as many passing ones, so a retry cannot "fix" a page
+        by dropping items; if re-extraction itself fails, the first answer is
+        kept. `reextracted_pages` lists only the pages that were replaced.
+        """
+        report = self._validator.validate(pages)
+        failing = [page_no for page_no in self._validator.failing_pages(report) if page_no in ocr_text]
+        if not failing or not self._reextract_failed_pages:
+            return pages, usage, report
+
+        problems: Dict[int, List[str]] = {page_no: [] for page_no in failing}
+        for issue in report.issues:
+            if issue.check == RATE_QUANTITY_CHECK and int(issue.page_no) in problems:
+                problems[int(issue.page_no)].append(f"{issue.item_name}: {issue.message}")
+        try:
+            retried, retry_usage = await self._llm.reextract_pages(
+                [(page_no, ocr_text[page_no], problems[page_no]) for page_no in failing]
+            )
+        except Exception:
+            logger.warning("Re-extraction of pages %s failed; keeping the first answers", failing, exc_info=True)
+            return pages, usage, report
+
+        originals = {page.page_no: page for page in pages}
+        replacements = {
+            page_no: page.model_copy(update={"page_no": page_no})
+            for page_no, page in zip(failing, retried)
+            if self._is_improvement(originals[page_no], page)
+        }
+        pages = [replacements.get(page.page_no, page) for page in pages]
 
-    def _build_response(self, pages: list[LLMPageExtraction]) -> ExtractionData:
+        report = self._validator.validate(pages)
+        report.reextracted_pages = [str(page_no) for page_no in failing if page_no in replacements]
+        return pages, LLMExtractionService.merge_usage(usage, retry_usage), report
+
+    @staticmethod
+    def _is_improvement(original: LLMPageExtraction, retried: LLMPageExtraction) -> bool:
+        original_failing = len(rate_quantity_mismatches(original.items))
+        retried_failing = len(rate_quantity_mismatches(retried.items))
+        return (
+            bool(retried.items)
+            and retried_failing < original_failing
+            and len(retried.items) - retried_failing >= len(original.items) - original_failing
+        )
+
+    def _build_response(
+        self, pages: list[LLMPageExtraction], duplicates: dict[int, int] | None = None
+    ) -> ExtractionData:
         if not pages:
             raise ValueError("No structured line items were returned by the LLM.")
         pagewise_data: list[PageLineItems] = []
@@ -70,5 +280,18 @@ class BillExtractionPipeline:
                 PageLineItems(page_no=str(page.page_no), page_type=page.page_type, bill_items=bill_items)
             )
 
+        # Collapsed duplicate pages are listed for traceability but carry no items,
+        # so their line items are never counted twice.
+        page_types = {page.page_no: page.page_type for page in pages}
+        for page_no, canonical_no in (duplicates or {}).items():
+            pagewise_data.append(
+                PageLineItems(
+                    page_no=str(page_no),
+                    page_type=page_types.get(canonical_no),
+                    duplicate_of=str(canonical_no),
+                )
+            )
+        pagewise_data.sort(key=lambda page: int(page.page_no))
+
         return ExtractionData(pagewise_line_items=pagewise_data, total_item_count=total_items)
 
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Protocol, Tuple
+
+from app.models.schemas import LLMPageExtraction
+
+FAST_TIER = "fast"
+STRONG_TIER = "strong"
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+
+
+class ModelBackend(Protocol):
+    """Anything that can turn a prompt into a JSON reply plus token usage (Gemini, or a local stub)."""
+
+    model_name: str
+
+    def generate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        ...
+
+    def warm_up(self) -> None:
+        ...
+
+
+class GeminiBackend:
+    """Google Gemini model returning JSON responses."""
+
+    def __init__(self, api_key: str, model: str) -> None:
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY is not configured.")
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model
+        self._model = genai.GenerativeModel(model_name=model)
+
+    def generate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        response = self._model.generate_content(
+            prompt,
+            generation_config={"response_mime_type": "application/json"},
+        )
+        message = response.text if hasattr(response, "text") else ""
+        return message, self._extract_usage(response)
+
+    def warm_up(self) -> None:
+        """Open the Gemini connection with a token count call, which is not billed."""
+        self._model.count_tokens("warm-up")
+
+    @staticmethod
+    def _extract_usage(response: object) -> Dict[str, int]:
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return {"total_tokens": 0, "input_tokens": 0, "output_tokens": 0}
+        return {
+            "total_tokens": getattr(usage, "total_token_count", 0) or 0,
+            "input_tokens": getattr(usage, "prompt_token_count", 0) or 0,
+            "output_tokens": getattr(usage, "candidates_token_count", 0) or 0,
+        }
+
+
+@dataclass
+class PageFeatures:
+    chars: int
+    numeric_lines: int
+    numeric_density: float
+
+
+class ModelRouter:
+    """
+    Picks a model tier per page from cheap local features of its OCR text.
+
+    Short pages with few numeric rows (a five-line pharmacy slip) go to the
+    fast tier; long or densely itemized pages go straight to the strong tier.
+    A fast-tier answer with no items for a page full of numeric rows is
+    escalated; rows failing rate x quantity are left to the pipeline's
+    targeted re-extraction, so a page never pays for two strong-tier retries.
+    """
+
+    def __init__(
+        self,
+        fast_max_chars: int = 3000,
+        fast_max_numeric_lines: int = 25,
+        fast_max_numeric_density: float = 0.5,
+    ) -> None:
+        self._fast_max_chars = fast_max_chars
+        self._fast_max_numeric_lines = fast_max_numeric_lines
+        self._fast_max_numeric_density = fast_max_numeric_density
+
+    @staticmethod
+    def features(text: str) -> PageFeatures:
+        lines = [line for line in text.splitlines() if line.strip()]
+        tokens = text.split()
+        numeric_tokens = sum(1 for token in tokens if _NUMBER_PATTERN.fullmatch(token.strip("₹$,:;|()")))
+        # A line with two or more numbers is most likely an item row (rate/qty/amount).
+        numeric_lines = sum(1 for line in lines if len(_NUMBER_PATTERN.findall(line)) >= 2)
+        return PageFeatures(
+            chars=len(text),
+            numeric_lines=numeric_lines,
+            numeric_density=numeric_tokens / len(tokens) if tokens else 0.0,
+        )
+
+    def choose(self, text: str, failed_validation: bool = False) -> str:
+        if failed_validation:
+            return STRONG_TIER
+        features = self.features(text)
+        # Number-heavy text only matters once the page is long enough to hold a real table.
+        dense = features.numeric_density > self._fast_max_numeric_density and features.chars > self._fast_max_chars // 2
+        if (
+            features.chars > self._fast_max_chars
+            or features.numeric_lines > self._fast_max_numeric_lines
+            or dense
+        ):
+            return STRONG_TIER
+        return FAST_TIER
+
+    def needs_escalation(self, page: LLMPageExtraction, text: str) -> bool:
+        """True when a page's extraction looks wrong enough to retry on the strong tier."""
+        return not page.items and self.features(text).numeric_lines >= 3
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import AsyncIterator, Dict, List, Optional
+
+
+class MultipartDocumentReader:
+    """
+    Streams a single file field out of a multipart/form-data body.
+
+    Unlike `Request.form()`, nothing is spooled to disk: body chunks are fed to
+    python-multipart's streaming parser and the bytes of the `field_name` part
+    are yielded as they arrive, so the caller's size limit applies while the
+    upload is still being read.
+    """
+
+    def __init__(self, stream: AsyncIterator[bytes], content_type: str, field_name: str = "document") -> None:
+        from multipart.multipart import MultipartParser, parse_options_header
+
+        _, params = parse_options_header(content_type)
+        boundary = params.get(b"boundary")
+        if not boundary:
+            raise ValueError("Multipart upload is missing a boundary.")
+
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self._parse_options_header = parse_options_header
+        self._stream = stream.__aiter__()
+        self._field_name = field_name.encode()
+        self._pending: List[bytes] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_target = False
+        self._found = False
+        self._done = False
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    async def start(self) -> None:
+        """Read until the document part's headers are parsed, so filename/content_type are known."""
+        while not self._found:
+            if not await self._feed():
+                raise ValueError(
+                    f"Multipart upload must include a '{self._field_name.decode()}' file field."
+                )
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            while self._pending:
+                yield self._pending.pop(0)
+            if self._done:
+                return
+            if not await self._feed():
+                # The body ended inside the document part: never store a truncated file.
+                raise ValueError("Incomplete multipart upload")
+
+    async def _feed(self) -> bool:
+        try:
+            chunk = await self._stream.__anext__()
+        except StopAsyncIteration:
+            return False
+        if chunk:
+            self._parser.write(chunk)
+        return True
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = self._parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self._found or options.get(b"name") != self._field_name:
+            return
+        self._found = True
+        self._in_target = True
+        filename = options.get(b"filename")
+        self.filename = filename.decode("utf-8", "replace") if filename else None
+        content_type = self._headers.get(b"content-type")
+        self.content_type = content_type.decode("latin-1") if content_type else None
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_target:
+            self._pending.append(bytes(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        if self._in_target:
+            self._in_target = False
+            self._done = True
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+from decimal import Decimal
+from typing import Dict, List, Sequence, Tuple
+
+from app.models.schemas import LLMItemSchema, LLMPageExtraction, ValidationIssue, ValidationReport
+
+RATE_QUANTITY_CHECK = "rate_quantity"
+PAGE_TOTAL_CHECK = "page_total"
+DUPLICATE_ITEM_CHECK = "duplicate_item"
+
+FINAL_BILL_PAGE_TYPE = "Final Bill"
+
+
+def amounts_match(expected: Decimal, actual: Decimal) -> bool:
+    """Allow for rounding on printed bills: 2% of the amount or one currency unit."""
+    return abs(expected - actual) <= max(Decimal("1"), abs(actual) * Decimal("0.02"))
+
+
+def rate_quantity_mismatches(items: Sequence[LLMItemSchema]) -> List[LLMItemSchema]:
+    """Items where item_amount != item_rate x item_quantity."""
+    return [
+        item
+        for item in items
+        if item.item_amount is not None
+        and item.item_rate is not None
+        and item.item_quantity is not None
+        and not amounts_match(item.item_rate * item.item_quantity, item.item_amount)
+    ]
+
+
+class ExtractionValidator:
+    """
+    Local arithmetic checks over every extracted row of a document.
+
+    The rows of all pages are flattened into one table so each check is a
+    single pass over columns rather than a per-page LLM round trip:
+
+    - rate_quantity: item_amount must equal item_rate x item_quantity
+    - page_total: items on detail pages must add up to the 'Final Bill' page
+    - duplicate_item: the same item/amount appearing on two detail pages
+
+    Only rate_quantity failures mark a page for re-extraction; the other checks
+    are reported so callers can see why a document might be off.
+    """
+
+    def validate(self, pages: Sequence[LLMPageExtraction]) -> ValidationReport:
+        rows: List[Tuple[LLMPageExtraction, LLMItemSchema]] = [
+            (page, item) for page in pages for item in page.items
+        ]
+        issues = (
+            self._check_rate_quantity(rows)
+            + self._check_page_totals(pages)
+            + self._check_duplicates(rows)
+        )
+        return ValidationReport(passed=not issues, issues=issues)
+
+    @staticmethod
+    def failing_pages(report: ValidationReport) -> List[int]:
+        """Pages worth re-extracting: those with rows failing the rate x quantity check."""
+        return sorted(
+            {int(issue.page_no) for issue in report.issues if issue.check == RATE_QUANTITY_CHECK}
+        )
+
+    @staticmethod
+    def _check_rate_quantity(rows: Sequence[Tuple[LLMPageExtraction, LLMItemSchema]]) -> List[ValidationIssue]:
+        mismatched = {id(item) for item in rate_quantity_mismatches([item for _, item in rows])}
+        return [
+            ValidationIssue(
+                page_no=str(page.page_no),
+                check=RATE_QUANTITY_CHECK,
+                item_name=item.item_name,
+                message=(
+                    f"item_amount {item.item_amount} != item_rate {item.item_rate}"
+                    f" x item_quantity {item.item_quantity}"
+                ),
+            )
+            for page, item in rows
+            if id(item) in mismatched
+        ]
+
+    @staticmethod
+    def _check_page_totals(pages: Sequence[LLMPageExtraction]) -> List[ValidationIssue]:
+        final_pages = [page for page in pages if page.page_type == FINAL_BILL_PAGE_TYPE]
+        detail_pages = [page for page in pages if page.page_type != FINAL_BILL_PAGE_TYPE]
+        if not final_pages or not detail_pages:
+            return []
+
+        def total(selected: Sequence[LLMPageExtraction]) -> Decimal:
+            return sum(
+                (item.item_amount for page in selected for item in page.items if item.item_amount),
+                Decimal("0"),
+            )
+
+        final_total, detail_total = total(final_pages), total(detail_pages)
+        if amounts_match(detail_total, final_total):
+            return []
+        return [
+            ValidationIssue(
+                page_no=str(page.page_no),
+                check=PAGE_TOTAL_CHECK,
+                message=f"Final Bill total {final_total} != sum of detail pages {detail_total}",
+            )
+            for page in final_pages
+        ]
+
+    @staticmethod
+    def _check_duplicates(rows: Sequence[Tuple[LLMPageExtraction, LLMItemSchema]]) -> List[ValidationIssue]:
+        first_seen: Dict[Tuple[str, Decimal | None], int] = {}
+        issues: List[ValidationIssue] = []
+        for page, item in rows:
+            if page.page_type == FINAL_BILL_PAGE_TYPE:
+                continue
+            key = (" ".join(item.item_name.lower().split()), item.item_amount)
+            seen_on = first_seen.setdefault(key, page.page_no)
+            if seen_on != page.page_no:
+                issues.append(
+                    ValidationIssue(
+                        page_no=str(page.page_no),
+                        check=DUPLICATE_ITEM_CHECK,
+                        item_name=item.item_name,
+                        message=f"Same item and amount already extracted on page {seen_on}",
+                    )
+                )
+        return issues
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Bulk extraction for backfills: run the pipeline over a directory or manifest.
+
+Usage:
+    python bulk_extract.py path/to/bills/ --output results.jsonl --jobs 8
+    python bulk_extract.py manifest.txt --output results.jsonl
+
+A manifest is a text file with one document path per line (relative paths are
+resolved against the manifest's directory).
+
+Results are appended to the output JSONL as each document finishes, one line
+per document. The output file doubles as the checkpoint: on restart, documents
+whose content hash is already in it are skipped, so an interrupted run simply
+resumes. Documents with identical content are only processed once; later
+copies in the same run get a `"skipped": "duplicate"` line naming the first.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.config import get_settings
+from app.services.document_processor import SUPPORTED_IMAGE_EXTENSIONS
+from app.services.pipeline import BillExtractionPipeline
+
+DOCUMENT_EXTENSIONS = SUPPORTED_IMAGE_EXTENSIONS | {".pdf"}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bulk bill extraction to JSONL.")
+    parser.add_argument("source", type=Path, help="Directory to walk, or a manifest file of paths")
+    parser.add_argument("--output", type=Path, default=Path("results.jsonl"), help="JSONL file to append results to")
+    parser.add_argument("--jobs", type=int, default=4, help="Documents processed concurrently")
+    parser.add_argument("--progress-every", type=int, default=25, help="Print progress every N documents")
+    return parser.parse_args()
+
+
+def discover(source: Path) -> list[Path]:
+    if source.is_dir():
+        return sorted(
+            path for path in source.rglob("*") if path.is_file() and path.suffix.lower() in DOCUMENT_EXTENSIONS
+        )
+    paths = []
+    for line in source.read_text().splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            path = Path(line)
+            paths.append(path if path.is_absolute() else source.parent / path)
+    return paths
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_checkpoint(output: Path) -> set[str]:
+    """Content hashes already written to `output` by a previous run."""
+    done = set()
+    if not output.exists():
+        return done
+    with output.open() as handle:
+        for line in handle:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a truncated last line.
+                continue
+            if record.get("is_success") and record.get("sha256"):
+                done.add(record["sha256"])
+    return done
+
+
+def ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as handle:
+        handle.seek(-1, 2)
+        return handle.read(1) == b"\n"
+
+
+class Progress:
+    def __init__(self, total: int, every: int) -> None:
+        self.total = total
+        self.every = every
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.started = time.monotonic()
+
+    def skip(self) -> None:
+        self.skipped += 1
+
+    def record(self, success: bool) -> None:
+        self.processed += 1
+        if not success:
+            self.failed += 1
+        if self.processed % self.every == 0:
+            print(self.summary(), file=sys.stderr, flush=True)
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.started
+        rate = self.processed / elapsed if elapsed else 0.0
+        remaining = self.total - self.processed - self.skipped
+        eta = f"{remaining / rate:.0f}s" if rate else "n/a"
+        return (
+            f"{self.processed + self.skipped}/{self.total} documents "
+            f"({self.processed} processed, {self.skipped} skipped, {self.failed} failed) | "
+            f"{rate * 60:.1f} docs/min | elapsed {elapsed:.0f}s | ETA {eta}"
+        )
+
+
+class ResultWriter:
+    """Appends one JSON line per document and flushes so progress survives interruption."""
+
+    def __init__(self, handle, progress: Progress) -> None:
+        self._handle = handle
+        self._progress = progress
+        self._lock = asyncio.Lock()
+
+    async def write(self, record: dict) -> None:
+        async with self._lock:
+            self._handle.write(json.dumps(record) + "\n")
+            self._handle.flush()
+        if record.get("skipped"):
+            self._progress.skip()
+        else:
+            self._progress.record(record["is_success"])
+
+
+async def worker(queue, pipeline, writer):
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        path, sha256 = item
+        started = time.monotonic()
+        record = {"path": str(path), "sha256": sha256}
+        try:
+            result = await pipeline.run_file(path, content_hash=sha256)
+            record.update(
+                is_success=True,
+                token_usage=result.token_usage.model_dump(),
+                data=result.data.model_dump(mode="json"),
+                validation=result.validation.model_dump() if result.validation else None,
+            )
+        except Exception as exc:
+            record.update(is_success=False, error=str(exc))
+        record["elapsed_seconds"] = round(time.monotonic() - started, 3)
+        await writer.write(record)
+
+
+async def main():
+    args = parse_args()
+    paths = discover(args.source)
+    done = load_checkpoint(args.output)
+    print(
+        f"Found {len(paths)} documents, {len(done)} already in {args.output}; "
+        f"processing with {args.jobs} jobs",
+        file=sys.stderr,
+    )
+    if not paths:
+        return
+
+    # Admission is sized to --jobs so the bulk run never rejects its own work;
+    # OCR slots, caches and the Gemini budget are still shared host-wide.
+    settings = get_settings().model_copy(
+        update={
+            "max_inflight_documents": args.jobs,
+            "max_queued_pages": sys.maxsize,
+            "admission_queue_timeout_seconds": 24 * 3600.0,
+        }
+    )
+    pipeline = BillExtractionPipeline(settings)
+    await pipeline.warm_up()
+
+    progress = Progress(total=len(paths), every=args.progress_every)
+    # Bounded queue: documents are hashed just ahead of the workers instead of
+    # all up front, so memory stays flat regardless of backlog size.
+    queue = asyncio.Queue(maxsize=args.jobs * 2)
+    with args.output.open("a") as handle:
+        if handle.tell() and not ends_with_newline(args.output):
+            handle.write("\n")  # terminate a line truncated by an interrupted run
+        writer = ResultWriter(handle, progress)
+        workers = [asyncio.create_task(worker(queue, pipeline, writer)) for _ in range(args.jobs)]
+        first_seen: dict[str, Path] = {}
+        for path in paths:
+            try:
+                sha256 = await asyncio.to_thread(content_hash, path)
+            except OSError as exc:
+                await writer.write({"path": str(path), "sha256": None, "is_success": False, "error": str(exc)})
+                continue
+            if sha256 in done:
+                progress.skip()
+                continue
+            if sha256 in first_seen:
+                await writer.write(
+                    {
+                        "path": str(path),
+                        "sha256": sha256,
+                        "skipped": "duplicate",
+                        "duplicate_of": str(first_seen[sha256]),
+                    }
+                )
+                continue
+            first_seen[sha256] = path
+            await queue.put((path, sha256))
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    await pipeline.aclose()
+
+    print(f"Finished: {progress.summary()}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
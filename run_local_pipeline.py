@@ -59,7 +59,7 @@ async def main():
     print(f"Processing local file: {path}")
 
     processor = DocumentProcessor(poppler_path=settings.poppler_path)
-    ocr = OCRService(tesseract_cmd=settings.tesseract_cmd)
+    ocr = OCRService(tesseract_cmd=settings.tesseract_cmd, layout_mode=settings.ocr_layout_mode)
 
     # Convert to images
     images = processor.to_images(path)
@@ -74,7 +74,11 @@ async def main():
         print("GEMINI_API_KEY not set in .env. LLM extraction skipped.")
         return
 
-    llm = LLMExtractionService(api_key=settings.gemini_api_key, model=settings.gemini_model)
+    llm = LLMExtractionService(
+        api_key=settings.gemini_api_key,
+        model=settings.gemini_model,
+        fast_model=settings.gemini_fast_model,
+    )
     llm_pages, usage = await llm.extract_pages(ocr_pages)
 
     print(f"LLM returned {len(llm_pages)} structured pages")
@@ -62,6 +62,7 @@ echo "📝 Available endpoints:"
 echo "   - GET  /           - API info"
 echo "   - GET  /health     - Health check"
 echo "   - POST /extract-bill-data - Extract bill items"
+echo "   - POST /extract-bill-data/upload - Extract bill items from an uploaded file"
 echo "   - GET  /docs       - Interactive API docs"
 echo ""
 echo "🌐 For public access, run ngrok in another terminal:"
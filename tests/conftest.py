@@ -0,0 +1,14 @@
+import pytest
+
+from app.config import get_settings
+
+
+@pytest.fixture
+def app_settings(tmp_path, monkeypatch):
+    """Point the app's settings at a temporary directory; set more env vars before the app starts."""
+    monkeypatch.setenv("TEMP_DIR", str(tmp_path / "tmp"))
+    monkeypatch.setenv("SHARED_STATE_DIR", str(tmp_path / "shared"))
+    monkeypatch.setenv("GEMINI_API_KEY", "")
+    get_settings.cache_clear()
+    yield tmp_path
+    get_settings.cache_clear()
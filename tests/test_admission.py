@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+
+
+def _controller(**overrides) -> AdmissionController:
+    options = dict(max_inflight_documents=1, max_queued_pages=10, queue_timeout_seconds=1.0, small_document_pages=2)
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+async def _hold(controller: AdmissionController, release: asyncio.Event, pages: int = 1, order=None, name=None):
+    async with controller.admit(pages):
+        if order is not None:
+            order.append(name)
+        await release.wait()
+
+
+def test_small_documents_jump_the_queue():
+    async def run():
+        controller = _controller()
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0)
+        large = asyncio.create_task(_hold(controller, release, pages=5, order=order, name="large"))
+        await asyncio.sleep(0)
+        small = asyncio.create_task(_hold(controller, release, pages=1, order=order, name="small"))
+        await asyncio.sleep(0)
+        assert controller.snapshot()["queued_documents"] == 2
+        release.set()
+        await asyncio.gather(holder, large, small)
+        return order, controller.snapshot()
+
+    order, snapshot = asyncio.run(run())
+
+    assert order == ["small", "large"]
+    assert snapshot["in_flight_documents"] == 0 and snapshot["queued_pages"] == 0
+
+
+def test_full_queue_is_rejected_with_429():
+    async def run():
+        controller = _controller(max_queued_pages=3)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(controller, release, pages=3))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit(2):
+                pass
+        with pytest.raises(AdmissionRejected):
+            controller.check_capacity()
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return rejected.value
+
+    rejected = asyncio.run(run())
+
+    assert rejected.status_code == 429
+    assert rejected.retry_after >= 1
+
+
+def test_waiting_past_the_timeout_is_rejected_with_503():
+    async def run():
+        controller = _controller(queue_timeout_seconds=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as rejected:
+            async with controller.admit(1):
+                pass
+        snapshot = controller.snapshot()
+        release.set()
+        await holder
+        return rejected.value, snapshot
+
+    rejected, snapshot = asyncio.run(run())
+
+    assert rejected.status_code == 503
+    assert snapshot["queued_documents"] == 0 and snapshot["queued_pages"] == 0
+    assert snapshot["in_flight_documents"] == 1
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        controller = _controller()
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(controller, asyncio.Event()))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        release.set()
+        await holder
+        return controller.snapshot()
+
+    snapshot = asyncio.run(run())
+
+    assert snapshot["in_flight_documents"] == 0 and snapshot["queued_pages"] == 0
+
+
+def test_slot_handed_to_a_waiter_cancelled_before_it_runs_is_passed_on():
+    async def run():
+        controller = _controller()
+        release = asyncio.Event()
+        order = []
+        holder = asyncio.create_task(_hold(controller, release))
+        await asyncio.sleep(0)
+        doomed = asyncio.create_task(_hold(controller, asyncio.Event(), order=order, name="doomed"))
+        await asyncio.sleep(0)
+        survivor = asyncio.create_task(_hold(controller, release, order=order, name="survivor"))
+        await asyncio.sleep(0)
+
+        # Release hands the slot to `doomed`, which is cancelled before it gets to run.
+        release.set()
+        await holder
+        doomed.cancel()
+        await asyncio.gather(doomed, return_exceptions=True)
+        await survivor
+        return order, controller.snapshot()
+
+    order, snapshot = asyncio.run(run())
+
+    assert order == ["survivor"]
+    assert snapshot["in_flight_documents"] == 0
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import sys
+
+import bulk_extract
+from app.models.schemas import ExtractionData, TokenUsage
+from app.services.pipeline import PipelineResult
+
+
+class StubPipeline:
+    """Stands in for BillExtractionPipeline; records which files were processed and with which hash."""
+
+    processed = []
+
+    def __init__(self, settings) -> None:
+        pass
+
+    async def warm_up(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        pass
+
+    async def run_file(self, path, content_hash=None):
+        StubPipeline.processed.append((path.name, content_hash))
+        return PipelineResult(
+            data=ExtractionData(pagewise_line_items=[], total_item_count=0), token_usage=TokenUsage()
+        )
+
+
+def test_discover_walks_directories_and_resolves_manifests(tmp_path):
+    (tmp_path / "bills" / "nested").mkdir(parents=True)
+    for name in ("b.pdf", "nested/a.PNG", "notes.txt"):
+        (tmp_path / "bills" / name).write_bytes(b"x")
+    manifest = tmp_path / "bills" / "manifest.txt"
+    manifest.write_text("# backfill\nb.pdf\n\n  nested/a.PNG  \n/abs/path/c.pdf\n")
+
+    assert bulk_extract.discover(tmp_path / "bills") == [
+        tmp_path / "bills" / "b.pdf",
+        tmp_path / "bills" / "nested" / "a.PNG",
+    ]
+    assert bulk_extract.discover(manifest) == [
+        tmp_path / "bills" / "b.pdf",
+        tmp_path / "bills" / "nested" / "a.PNG",
+        bulk_extract.Path("/abs/path/c.pdf"),
+    ]
+
+
+def test_checkpoint_only_counts_successful_records_and_skips_truncated_lines(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"sha256": "done", "is_success": True}) + "\n"
+        + json.dumps({"sha256": "failed", "is_success": False}) + "\n"
+        + json.dumps({"sha256": "dup", "skipped": "duplicate"}) + "\n"
+        + '{"sha256": "cut", "is_succ'
+    )
+
+    assert bulk_extract.load_checkpoint(output) == {"done"}
+    assert bulk_extract.load_checkpoint(tmp_path / "missing.jsonl") == set()
+    assert not bulk_extract.ends_with_newline(output)
+
+
+def test_resumed_run_repairs_output_skips_done_work_and_records_duplicates(tmp_path, app_settings, monkeypatch):
+    bills = tmp_path / "bills"
+    bills.mkdir()
+    (bills / "a.pdf").write_bytes(b"%PDF-1.4 a")
+    (bills / "b.pdf").write_bytes(b"%PDF-1.4 b")
+    (bills / "c.pdf").write_bytes(b"%PDF-1.4 b")  # same content as b.pdf
+    (bills / "d.pdf").write_bytes(b"%PDF-1.4 d")
+    done_hash = bulk_extract.content_hash(bills / "a.pdf")
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"path": str(bills / "a.pdf"), "sha256": done_hash, "is_success": True}) + "\n"
+        + '{"path": "interrupted'
+    )
+    StubPipeline.processed = []
+    monkeypatch.setattr(bulk_extract, "BillExtractionPipeline", StubPipeline)
+    monkeypatch.setattr(sys, "argv", ["bulk_extract.py", str(bills), "--output", str(output), "--jobs", "2"])
+
+    asyncio.run(bulk_extract.main())
+
+    lines = output.read_text().splitlines()
+    assert lines[1] == '{"path": "interrupted'
+    records = [json.loads(line) for line in lines[2:]]
+    assert sorted(name for name, _ in StubPipeline.processed) == ["b.pdf", "d.pdf"]
+    # The hash computed for the checkpoint is passed on, so files are not hashed twice.
+    assert all(
+        content_hash == bulk_extract.content_hash(bills / name) for name, content_hash in StubPipeline.processed
+    )
+    assert {
+        "path": str(bills / "c.pdf"),
+        "sha256": bulk_extract.content_hash(bills / "b.pdf"),
+        "skipped": "duplicate",
+        "duplicate_of": str(bills / "b.pdf"),
+    } in records
+    assert sorted(record["path"] for record in records if record.get("is_success")) == [
+        str(bills / "b.pdf"),
+        str(bills / "d.pdf"),
+    ]
+    # A second resume finds everything done and writes nothing new.
+    asyncio.run(bulk_extract.main())
+    assert output.read_text().splitlines() == lines
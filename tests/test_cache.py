@@ -0,0 +1,77 @@
+import sqlite3
+
+import pytest
+
+from app.services.cache import SharedCache
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0) -> None:
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr("app.services.cache.time", clock)
+    return clock
+
+
+def _rows(path):
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT namespace, key FROM cache ORDER BY created").fetchall()
+
+
+def test_values_are_shared_between_instances_and_namespaced(tmp_path, clock):
+    path = tmp_path / "cache.sqlite3"
+    SharedCache(path).set("ocr", "page", "text")
+
+    other_worker = SharedCache(path)
+
+    assert other_worker.get("ocr", "page") == "text"
+    assert other_worker.get("document", "page") is None
+
+
+def test_entries_expire_after_the_ttl(tmp_path, clock):
+    cache = SharedCache(tmp_path / "cache.sqlite3", ttl_seconds=60)
+    cache.set("ocr", "page", "text")
+
+    clock.now += 61
+
+    assert cache.get("ocr", "page") is None
+
+
+def test_zero_ttl_disables_the_cache(tmp_path):
+    cache = SharedCache(tmp_path / "cache.sqlite3", ttl_seconds=0)
+    cache.set("ocr", "page", "text")
+
+    assert not cache.enabled
+    assert cache.get("ocr", "page") is None
+    assert not (tmp_path / "cache.sqlite3").exists()
+
+
+def test_writes_periodically_delete_expired_rows(tmp_path, clock):
+    path = tmp_path / "cache.sqlite3"
+    cache = SharedCache(path, ttl_seconds=60, purge_every=3)
+    cache.set("ocr", "old", "text")
+    clock.now += 61
+    cache.set("ocr", "new-1", "text")
+    assert len(_rows(path)) == 2
+
+    cache.set("ocr", "new-2", "text")
+
+    assert _rows(path) == [("ocr", "new-1"), ("ocr", "new-2")]
+
+
+def test_oldest_entries_are_dropped_beyond_max_bytes(tmp_path, clock):
+    path = tmp_path / "cache.sqlite3"
+    cache = SharedCache(path, max_bytes=250, purge_every=1)
+    for index in range(5):
+        clock.now += 1
+        cache.set("document", f"doc-{index}", "x" * 100)
+
+    assert _rows(path) == [("document", "doc-3"), ("document", "doc-4")]
+    assert cache.get("document", "doc-4") == "x" * 100
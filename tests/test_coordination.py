@@ -0,0 +1,78 @@
+import asyncio
+import threading
+import time
+
+from app.services.coordination import HostSlotPool, SharedRateLimiter
+
+
+def test_slot_pool_never_exceeds_its_size(tmp_path):
+    # Two pools on the same lock directory stand in for two worker processes.
+    pools = [HostSlotPool(tmp_path, size=2), HostSlotPool(tmp_path, size=2)]
+    lock = threading.Lock()
+    active = peak = 0
+
+    def work(pool):
+        nonlocal active, peak
+        with pool.slot():
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+
+    threads = [threading.Thread(target=work, args=(pools[index % 2],)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert pools[0].size == 2
+    assert peak == 2
+
+
+def test_slot_is_released_on_error(tmp_path):
+    pool = HostSlotPool(tmp_path, size=1)
+    try:
+        with pool.slot():
+            raise RuntimeError
+    except RuntimeError:
+        pass
+
+    with pool.slot():
+        pass
+
+
+def test_rate_limiter_is_shared_and_waits_without_a_thread(tmp_path, monkeypatch):
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+        # Let the bucket refill as if the time had passed.
+        with limiters[0]._connect() as conn:
+            conn.execute("UPDATE rate_limits SET updated = updated - ?", (seconds,))
+
+    monkeypatch.setattr("app.services.coordination.asyncio.sleep", fake_sleep)
+    db_path = tmp_path / "rate_limits.sqlite3"
+    limiters = [SharedRateLimiter(db_path, "gemini", requests_per_minute=60, burst=2) for _ in range(2)]
+
+    async def run():
+        for limiter in (limiters[0], limiters[1], limiters[0]):
+            await limiter.acquire()
+
+    asyncio.run(run())
+
+    # The burst of 2 is shared by both instances; the third call waits about a second.
+    assert len(sleeps) == 1
+    assert 0.9 <= sleeps[0] <= 1.0
+
+
+def test_zero_rate_disables_limiting(tmp_path):
+    limiter = SharedRateLimiter(tmp_path / "rate_limits.sqlite3", "gemini", requests_per_minute=0)
+
+    async def run():
+        for _ in range(100):
+            await limiter.acquire()
+
+    asyncio.run(run())
+    assert not (tmp_path / "rate_limits.sqlite3").exists()
@@ -0,0 +1,76 @@
+import random
+
+from PIL import Image, ImageDraw, ImageEnhance
+
+from app.services.dedup import PageDeduplicator
+
+
+def _bill(seed: int, size=(850, 1100)) -> Image.Image:
+    """A bill-like page: a fixed header and table grid, with row 'text' blocks varying by seed."""
+    width, height = size
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 40, width - 40, 140), fill=(60, 60, 60))
+    for y in range(200, height - 80, 40):
+        draw.line((40, y, width - 40, y), fill=(150, 150, 150), width=2)
+    rng = random.Random(seed)
+    for y in range(210, height - 100, 40):
+        x = 50
+        while x < width - 120:
+            block = rng.randint(30, 160)
+            if rng.random() < 0.7:
+                draw.rectangle((x, y, x + block, y + 18), fill="black")
+            x += block + rng.randint(15, 60)
+    return image
+
+
+def _rescan(image: Image.Image, seed: int = 0) -> Image.Image:
+    """The same page scanned again: darker, with a little speckle noise."""
+    copy = ImageEnhance.Brightness(image).enhance(0.85)
+    draw = ImageDraw.Draw(copy)
+    rng = random.Random(seed)
+    for _ in range(300):
+        x, y = rng.randrange(copy.width), rng.randrange(copy.height)
+        draw.point((x, y), fill="black")
+    return copy
+
+
+def test_identical_and_rescanned_pages_map_to_the_first_copy():
+    page = _bill(1)
+    images = [page, _bill(2), page.copy(), _rescan(page)]
+
+    assert PageDeduplicator().find_duplicates(images) == {3: 1, 4: 1}
+
+
+def test_distinct_pages_are_kept():
+    images = [_bill(seed) for seed in range(1, 6)]
+
+    assert PageDeduplicator().find_duplicates(images) == {}
+
+
+def test_pages_with_a_different_aspect_ratio_are_never_collapsed():
+    page = _bill(1)
+    stretched = page.resize((1000, 1100))
+
+    # Even with the hash and pixel thresholds wide open, the aspect guard applies.
+    deduplicator = PageDeduplicator(max_distance=256, max_pixel_difference=255)
+
+    assert deduplicator.find_duplicates([page, stretched]) == {}
+
+
+def test_pixel_check_rejects_pages_on_the_same_template():
+    # With the hash threshold wide open every page is a candidate; only the
+    # thumbnail comparison keeps same-template pages with different rows apart.
+    deduplicator = PageDeduplicator(max_distance=256)
+    first, second = _bill(1), _bill(2)
+
+    assert deduplicator.find_duplicates([first, second]) == {}
+    assert deduplicator.pixel_difference(
+        deduplicator._thumbnail(first.convert("L")), deduplicator._thumbnail(second.convert("L"))
+    ) > 6.0
+
+
+def test_negative_max_distance_disables_deduplication():
+    page = _bill(1)
+
+    assert PageDeduplicator(max_distance=-1).find_duplicates([page, page.copy()]) == {}
@@ -0,0 +1,99 @@
+import asyncio
+import json
+import re
+from typing import Dict, List, Tuple
+
+from app.services.llm import LLMExtractionService
+from app.services.routing import FAST_TIER, STRONG_TIER, ModelRouter
+
+
+class StubBackend:
+    """A `ModelBackend` that answers from a per-page script and records every prompt it sees."""
+
+    def __init__(self, model_name: str, replies: Dict[int, dict], tokens: int = 10) -> None:
+        self.model_name = model_name
+        self.prompts: List[str] = []
+        self._replies = replies
+        self._tokens = tokens
+
+    def generate(self, prompt: str) -> Tuple[str, Dict[str, int]]:
+        self.prompts.append(prompt)
+        page_no = int(re.search(r"PAGE NUMBER: (\d+)", prompt).group(1))
+        reply = self._replies.get(page_no, {"page_type": "Bill Detail", "items": []})
+        return json.dumps(reply), {
+            "total_tokens": self._tokens,
+            "input_tokens": self._tokens - 2,
+            "output_tokens": 2,
+        }
+
+    def warm_up(self) -> None:
+        pass
+
+
+def _items(count: int) -> dict:
+    return {
+        "page_type": "Bill Detail",
+        "items": [
+            {"item_name": f"item{i}", "item_amount": 20.0, "item_rate": 10.0, "item_quantity": 2.0}
+            for i in range(count)
+        ],
+    }
+
+
+SHORT_PAGE = "Paracetamol | 2 | 10.00 | 20.00\nSyringe | 1 | 5.00 | 5.00\nCotton | 1 | 3.00 | 3.00"
+LONG_PAGE = "\n".join(f"Item {i} | {i} | 10.00 | {i * 10}.00" for i in range(1, 40))
+
+
+def _service(fast_replies, strong_replies):
+    backends = {
+        FAST_TIER: StubBackend("stub-fast", fast_replies, tokens=10),
+        STRONG_TIER: StubBackend("stub-strong", strong_replies, tokens=100),
+    }
+    return LLMExtractionService(backends=backends, router=ModelRouter(fast_max_numeric_lines=25)), backends
+
+
+def test_router_picks_fast_for_short_pages_and_strong_for_long_ones():
+    router = ModelRouter(fast_max_numeric_lines=25)
+
+    assert router.choose(SHORT_PAGE) == FAST_TIER
+    assert router.choose(LONG_PAGE) == STRONG_TIER
+    assert router.choose(SHORT_PAGE, failed_validation=True) == STRONG_TIER
+
+
+def test_pages_are_routed_per_tier_and_usage_is_split_by_tier():
+    service, backends = _service({1: _items(3)}, {2: _items(39)})
+
+    pages, usage = asyncio.run(service.extract_pages([(1, SHORT_PAGE), (2, LONG_PAGE)]))
+
+    assert [len(page.items) for page in pages] == [3, 39]
+    assert len(backends[FAST_TIER].prompts) == 1
+    assert len(backends[STRONG_TIER].prompts) == 1
+    assert usage["total_tokens"] == 110
+    assert usage["by_tier"] == {
+        FAST_TIER: {"model": "stub-fast", "calls": 1, "total_tokens": 10, "input_tokens": 8, "output_tokens": 2},
+        STRONG_TIER: {"model": "stub-strong", "calls": 1, "total_tokens": 100, "input_tokens": 98, "output_tokens": 2},
+    }
+
+
+def test_empty_fast_answer_is_escalated_to_strong_tier():
+    service, backends = _service({}, {1: _items(3)})
+
+    pages, usage = asyncio.run(service.extract_pages([(1, SHORT_PAGE)]))
+
+    assert len(pages[0].items) == 3
+    assert usage["by_tier"][FAST_TIER]["calls"] == 1
+    assert usage["by_tier"][STRONG_TIER]["calls"] == 1
+    assert usage["total_tokens"] == 110
+
+
+def test_reextraction_uses_strong_tier_with_review_notes():
+    service, backends = _service({1: _items(3)}, {1: _items(3)})
+
+    pages, usage = asyncio.run(service.reextract_pages([(1, SHORT_PAGE, ["item0: 10 x 2 != 25"])]))
+
+    assert pages[0].page_no == 1
+    assert not backends[FAST_TIER].prompts
+    assert "item0: 10 x 2 != 25" in backends[STRONG_TIER].prompts[0]
+    assert usage["by_tier"] == {
+        STRONG_TIER: {"model": "stub-strong", "calls": 1, "total_tokens": 100, "input_tokens": 98, "output_tokens": 2}
+    }
@@ -0,0 +1,69 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.pipeline import BillExtractionPipeline
+
+pytestmark = pytest.mark.usefixtures("app_settings")
+
+
+@pytest.fixture
+def warm_up_gate(monkeypatch):
+    gate = threading.Event()
+
+    async def warm_up(self):
+        while not gate.is_set():
+            await asyncio.sleep(0.01)
+
+    monkeypatch.setattr(BillExtractionPipeline, "warm_up", warm_up)
+    return gate
+
+
+def _wait_ready(client, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        response = client.get("/health/ready")
+        if response.status_code == 200:
+            return response
+        time.sleep(0.02)
+    raise AssertionError("service never became ready")
+
+
+def test_requests_get_503_with_retry_after_until_warm_up_finishes(warm_up_gate):
+    with TestClient(app) as client:
+        ready = client.get("/health/ready")
+        extract = client.post("/extract-bill-data", json={"document": "https://example.com/bill.pdf"})
+        upload = client.post(
+            "/extract-bill-data/upload", content=b"%PDF-1.4", headers={"content-type": "application/pdf"}
+        )
+
+        assert client.get("/health").status_code == 200
+        assert ready.status_code == 503 and ready.json() == {"status": "starting"}
+        for response in (ready, extract, upload):
+            assert response.status_code == 503
+            assert response.headers["retry-after"] == "5"
+
+        warm_up_gate.set()
+        response = _wait_ready(client)
+
+    assert response.json()["status"] == "ready"
+    assert response.json()["admission"]["in_flight_documents"] == 0
+
+
+def test_slow_warm_up_is_bounded_by_its_timeout(warm_up_gate, monkeypatch):
+    monkeypatch.setenv("WARM_UP_TIMEOUT_SECONDS", "0.1")
+
+    with TestClient(app) as client:
+        _wait_ready(client)
+
+
+def test_bad_configuration_aborts_start_up(monkeypatch):
+    monkeypatch.setenv("OCR_LAYOUT_MODE", "bogus")
+
+    with pytest.raises(ValueError, match="Unsupported OCR layout mode"):
+        with TestClient(app):
+            pass
@@ -0,0 +1,112 @@
+from itertools import groupby
+from typing import List
+
+import pytest
+from PIL import Image, ImageDraw
+
+from app.services.ocr import OCRService, _Word
+
+WIDTH = 400
+
+
+def _page(lines: List[int], pitch: int, line_height: int) -> Image.Image:
+    """A tall page with one bar per line; each bar's grey level is its line id, so strips can be 'read'."""
+    image = Image.new("L", (WIDTH, pitch * len(lines) + 40), 255)
+    draw = ImageDraw.Draw(image)
+    for index, line_id in enumerate(lines):
+        top = 20 + index * pitch
+        draw.rectangle((10, top, WIDTH - 10, top + line_height - 1), fill=line_id)
+    return image.convert("RGB")
+
+
+def _fake_words(texts):
+    """Stand-in for Tesseract: every run of rows with the same grey level becomes a name and an amount word."""
+
+    def words(strip: Image.Image) -> List[_Word]:
+        pixels = strip.convert("L").load()
+        levels = [pixels[WIDTH // 2, y] for y in range(strip.height)]
+        found = []
+        y = 0
+        for level, run in groupby(levels):
+            height = len(list(run))
+            if level < 128:
+                name, amount = texts[level]
+                found.append(_Word(text=name, left=10, top=y, width=80, height=height))
+                found.append(_Word(text=amount, left=300, top=y, width=60, height=height))
+            y += height
+        return found
+
+    return words
+
+
+def _service(monkeypatch, texts, layout_mode="table") -> OCRService:
+    service = OCRService(layout_mode=layout_mode, tile_height=1000, tile_overlap=80)
+    monkeypatch.setattr(service, "_words", _fake_words(texts))
+    return service
+
+
+def test_tile_bounds_cover_page_without_gaps():
+    image = _page(list(range(1, 101)), pitch=40, line_height=20)
+    bounds = OCRService(tile_height=1000)._tile_bounds(image)
+
+    assert len(bounds) > 1
+    assert bounds[0][0] == 0 and bounds[-1][1] == image.height
+    assert all(prev[1] == cur[0] for prev, cur in zip(bounds, bounds[1:]))
+
+
+def test_tiled_page_reads_every_line_exactly_once(monkeypatch):
+    lines = list(range(1, 121))
+    texts = {line_id: (f"item{line_id}", f"{line_id}.00") for line_id in lines}
+    image = _page(lines, pitch=40, line_height=20)
+
+    text = _service(monkeypatch, texts)._ocr_tiled(image)
+
+    assert text.splitlines() == [f"item{line_id} | {line_id}.00" for line_id in lines]
+
+
+def test_identical_consecutive_rows_at_a_seam_are_kept(monkeypatch):
+    # Two genuinely repeated rows (e.g. the same syringe billed twice) must both survive stitching.
+    lines = list(range(1, 121))
+    texts = {line_id: (f"item{line_id}", f"{line_id}.00") for line_id in lines}
+    for line_id in range(20, 31):
+        texts[line_id] = ("Syringe", "5.00")
+    image = _page(lines, pitch=40, line_height=20)
+    service = _service(monkeypatch, texts)
+    seams = [bottom for _, bottom in service._tile_bounds(image)[:-1]]
+    assert any(20 + 19 * 40 <= seam <= 20 + 30 * 40 for seam in seams)
+
+    text = service._ocr_tiled(image)
+
+    assert text.splitlines().count("Syringe | 5.00") == 11
+    assert len(text.splitlines()) == len(lines)
+
+
+@pytest.mark.parametrize("layout_mode", ["table", "text"])
+def test_lines_cut_by_a_seam_are_not_duplicated(monkeypatch, layout_mode):
+    # Back-to-back bars leave no whitespace row, so cuts land inside a line.
+    lines = list(range(1, 121))
+    texts = {line_id: (f"item{line_id}", f"{line_id}.00") for line_id in lines}
+    image = _page(lines, pitch=30, line_height=30)
+
+    text = _service(monkeypatch, texts, layout_mode)._ocr_tiled(image)
+
+    separator = " | " if layout_mode == "table" else " "
+    assert text.splitlines() == [f"item{line_id}{separator}{line_id}.00" for line_id in lines]
+
+
+def test_cluster_rows_groups_words_by_line_and_orders_them():
+    words = [
+        _Word("20.00", left=300, top=52, width=50, height=20),
+        _Word("Paracetamol", left=10, top=50, width=110, height=20),
+        _Word("500mg", left=125, top=48, width=50, height=20),
+        _Word("Syringe", left=10, top=80, width=70, height=20),
+        _Word("5.00", left=300, top=81, width=40, height=20),
+    ]
+
+    rows = OCRService._cluster_rows(words)
+
+    assert [[word.text for word in row] for row in rows] == [
+        ["Paracetamol", "500mg", "20.00"],
+        ["Syringe", "5.00"],
+    ]
+    assert [OCRService._format_row(row) for row in rows] == ["Paracetamol 500mg | 20.00", "Syringe | 5.00"]
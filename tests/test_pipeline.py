@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app.config import Settings
+from app.models.schemas import LLMPageExtraction
+from app.services.llm import LLMExtractionService
+from app.services.pipeline import BillExtractionPipeline
+from app.services.routing import FAST_TIER, STRONG_TIER
+from tests.test_llm import SHORT_PAGE, StubBackend
+
+GOOD_ROW = {"item_name": "Paracetamol", "item_amount": 20.0, "item_rate": 10.0, "item_quantity": 2.0}
+BAD_ROW = {"item_name": "Syringe", "item_amount": 25.0, "item_rate": 10.0, "item_quantity": 2.0}
+
+
+class FailingBackend(StubBackend):
+    def generate(self, prompt):
+        raise RuntimeError("model unavailable")
+
+
+def _page(*rows):
+    return {"page_type": "Bill Detail", "items": list(rows)}
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    return BillExtractionPipeline(Settings(gemini_api_key=None, temp_dir=tmp_path, shared_state_dir=tmp_path))
+
+
+def _extract(pipeline, strong, first=None):
+    fast = StubBackend("stub-fast", {1: first or _page(GOOD_ROW, BAD_ROW)})
+    pipeline._llm = LLMExtractionService(backends={FAST_TIER: fast, STRONG_TIER: strong})
+
+    async def run():
+        pages, usage = await pipeline._llm.extract_pages([(1, SHORT_PAGE)])
+        return await pipeline._validate(pages, usage, {1: SHORT_PAGE})
+
+    return asyncio.run(run())
+
+
+def test_failing_page_is_reextracted_once_and_replaced_when_better(pipeline):
+    strong = StubBackend("stub-strong", {1: _page(GOOD_ROW, dict(BAD_ROW, item_amount=20.0))})
+
+    pages, usage, report = _extract(pipeline, strong)
+
+    assert report.passed and report.reextracted_pages == ["1"]
+    assert [item.item_amount for item in pages[0].items] == [20.0, 20.0]
+    # One fast call, then a single strong re-extraction with review notes; no blind escalation.
+    assert usage["by_tier"][FAST_TIER]["calls"] == 1
+    assert usage["by_tier"][STRONG_TIER]["calls"] == 1
+    assert "REVIEW:" in strong.prompts[0]
+
+
+def test_worse_reextraction_keeps_the_first_answer(pipeline):
+    strong = StubBackend("stub-strong", {1: _page(BAD_ROW, dict(BAD_ROW, item_name="Cotton"))})
+
+    pages, usage, report = _extract(pipeline, strong)
+
+    assert [item.item_name for item in pages[0].items] == ["Paracetamol", "Syringe"]
+    assert not report.passed and report.reextracted_pages == []
+    assert usage["by_tier"][STRONG_TIER]["calls"] == 1
+
+
+def test_reextraction_that_drops_passing_rows_keeps_the_first_answer(pipeline):
+    # Ten good rows and one failing row; the retry "fixes" the page by returning a single row.
+    first = _page(*(dict(GOOD_ROW, item_name=f"item{i}") for i in range(10)), BAD_ROW)
+    strong = StubBackend("stub-strong", {1: _page(GOOD_ROW)})
+
+    pages, _, report = _extract(pipeline, strong, first)
+
+    assert len(pages[0].items) == 11
+    assert not report.passed and report.reextracted_pages == []
+
+
+def test_empty_reextraction_keeps_the_first_answer(pipeline):
+    pages, _, _ = _extract(pipeline, StubBackend("stub-strong", {1: _page()}))
+
+    assert len(pages[0].items) == 2
+
+
+def test_reextraction_error_keeps_the_first_answer(pipeline):
+    pages, usage, report = _extract(pipeline, FailingBackend("stub-strong", {}))
+
+    assert [item.item_name for item in pages[0].items] == ["Paracetamol", "Syringe"]
+    assert not report.passed and report.reextracted_pages == []
+    assert STRONG_TIER not in usage["by_tier"]
+
+
+def test_duplicate_pages_are_listed_without_items(pipeline):
+    pages = [
+        LLMPageExtraction.model_validate({"page_no": 1, **_page(GOOD_ROW)}),
+        LLMPageExtraction.model_validate({"page_no": 3, "page_type": "Pharmacy", "items": [GOOD_ROW]}),
+    ]
+
+    data = pipeline._build_response(pages, {2: 1})
+
+    assert [page.page_no for page in data.pagewise_line_items] == ["1", "2", "3"]
+    duplicate = data.pagewise_line_items[1]
+    assert duplicate.duplicate_of == "1"
+    assert duplicate.bill_items == []
+    assert duplicate.page_type == "Bill Detail"
+    assert data.total_item_count == 2
@@ -0,0 +1,121 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import ExtractionData, TokenUsage
+from app.services.pipeline import BillExtractionPipeline, PipelineResult
+
+PDF = b"%PDF-1.4\n" + b"0" * 500
+PNG = b"\x89PNG\r\n\x1a\n" + b"0" * 500
+BOUNDARY = "bill-boundary"
+MULTIPART = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def _multipart(*parts, close=True) -> bytes:
+    body = b""
+    for name, filename, content_type, content in parts:
+        disposition = f'form-data; name="{name}"' + (f'; filename="{filename}"' if filename else "")
+        body += f"--{BOUNDARY}\r\nContent-Disposition: {disposition}\r\n".encode()
+        if content_type:
+            body += f"Content-Type: {content_type}\r\n".encode()
+        body += b"\r\n" + content + b"\r\n"
+    if close:
+        body += f"--{BOUNDARY}--\r\n".encode()
+    return body
+
+
+@pytest.fixture
+def received(app_settings, monkeypatch):
+    """Run the app with processing stubbed out; yields the (suffix, bytes, path) of each stored upload."""
+    monkeypatch.setenv("MAX_DOCUMENT_BYTES", "2000")
+    stored = []
+
+    async def warm_up(self):
+        pass
+
+    async def process(self, local_path, cache_key=None):
+        stored.append((local_path.suffix, local_path.read_bytes(), local_path))
+        return PipelineResult(
+            data=ExtractionData(pagewise_line_items=[], total_item_count=0), token_usage=TokenUsage()
+        )
+
+    monkeypatch.setattr(BillExtractionPipeline, "warm_up", warm_up)
+    monkeypatch.setattr(BillExtractionPipeline, "_process", process)
+    with TestClient(app) as client:
+        while client.get("/health/ready").status_code != 200:
+            pass
+        yield client, stored
+
+
+def _post(client, body, content_type=None, **headers):
+    if content_type:
+        headers["content-type"] = content_type
+    return client.post("/extract-bill-data/upload", content=body, headers=headers)
+
+
+def test_multipart_upload_stores_only_the_document_field(received):
+    client, stored = received
+    body = _multipart(("note", None, None, b"please hurry"), ("document", "bill.pdf", "application/pdf", PDF))
+
+    response = _post(client, body, MULTIPART)
+
+    assert response.status_code == 200, response.text
+    assert [(suffix, content) for suffix, content, _ in stored] == [(".pdf", PDF)]
+    # The stored copy is removed once the upload has been processed.
+    assert not stored[0][2].exists()
+
+
+def test_raw_body_is_sniffed_before_the_client_content_type(received):
+    # curl --data-binary @bill.pdf sends application/x-www-form-urlencoded.
+    client, stored = received
+
+    assert _post(client, PDF, "application/x-www-form-urlencoded").status_code == 200
+    assert _post(client, PNG, "application/octet-stream", **{"x-filename": "scan"}).status_code == 200
+    # Bytes that cannot be identified fall back to the client's Content-Type.
+    assert _post(client, bytes(range(256)), "image/jpeg").status_code == 200
+    assert [suffix for suffix, _, _ in stored] == [".pdf", ".png", ".jpg"]
+
+
+@pytest.mark.parametrize("content_type", ["application/pdf", MULTIPART])
+def test_declared_oversize_body_is_rejected_before_reading(received, content_type):
+    client, stored = received
+
+    response = _post(client, PDF, content_type, **{"content-length": "999999"})
+
+    assert response.status_code == 413
+    assert not stored
+
+
+@pytest.mark.parametrize("multipart", [False, True])
+def test_oversize_body_without_content_length_is_cut_off_while_streaming(received, multipart):
+    client, stored = received
+    document = PDF * 5
+    body = _multipart(("document", "bill.pdf", "application/pdf", document)) if multipart else document
+
+    def chunked():
+        for start in range(0, len(body), 256):
+            yield body[start:start + 256]
+
+    response = _post(client, chunked(), MULTIPART if multipart else "application/pdf")
+
+    assert response.status_code == 413
+    assert not stored
+
+
+@pytest.mark.parametrize(
+    "body, content_type, message",
+    [
+        (_multipart(("file", "bill.pdf", "application/pdf", PDF)), MULTIPART, "must include a 'document'"),
+        (_multipart(("document", "bill.pdf", "application/pdf", PDF)), "multipart/form-data", "missing a boundary"),
+        (_multipart(("document", "bill.pdf", "application/pdf", PDF), close=False), MULTIPART, "Incomplete multipart"),
+        (b"", "application/pdf", "empty"),
+    ],
+)
+def test_malformed_uploads_are_rejected(received, body, content_type, message):
+    client, stored = received
+
+    response = _post(client, body, content_type)
+
+    assert response.status_code == 400
+    assert message in response.json()["detail"]
+    assert not stored
@@ -0,0 +1,62 @@
+from app.models.schemas import LLMPageExtraction
+from app.services.validation import (
+    DUPLICATE_ITEM_CHECK,
+    PAGE_TOTAL_CHECK,
+    RATE_QUANTITY_CHECK,
+    ExtractionValidator,
+)
+
+
+def _page(page_no, items, page_type="Bill Detail"):
+    return LLMPageExtraction.model_validate(
+        {
+            "page_no": page_no,
+            "page_type": page_type,
+            "items": [
+                {"item_name": name, "item_amount": amount, "item_rate": rate, "item_quantity": quantity}
+                for name, amount, rate, quantity in items
+            ],
+        }
+    )
+
+
+def test_consistent_document_passes():
+    pages = [
+        _page(1, [("Consultation", 500, 500, 1), ("Paracetamol", 30, 10, 3)]),
+        _page(2, [("X-Ray", 800, None, None)]),
+        _page(3, [("Grand Total", 1330, None, None)], page_type="Final Bill"),
+    ]
+
+    report = ExtractionValidator().validate(pages)
+
+    assert report.passed and report.issues == []
+
+
+def test_rate_quantity_mismatch_marks_only_its_page_for_reextraction():
+    pages = [
+        _page(1, [("Syringe", 25, 10, 2), ("Rounded", 100.5, 33.33, 3)]),
+        _page(2, [("Gloves", 40, 20, 2)]),
+    ]
+    validator = ExtractionValidator()
+
+    report = validator.validate(pages)
+
+    assert [(issue.page_no, issue.check, issue.item_name) for issue in report.issues] == [
+        ("1", RATE_QUANTITY_CHECK, "Syringe")
+    ]
+    assert validator.failing_pages(report) == [1]
+
+
+def test_page_totals_and_duplicates_are_reported_without_reextraction():
+    pages = [
+        _page(1, [("Consultation", 500, None, None)]),
+        _page(2, [("consultation ", 500, None, None)]),
+        _page(3, [("Grand Total", 900, None, None)], page_type="Final Bill"),
+    ]
+    validator = ExtractionValidator()
+
+    report = validator.validate(pages)
+
+    checks = {(issue.page_no, issue.check) for issue in report.issues}
+    assert checks == {("3", PAGE_TOTAL_CHECK), ("2", DUPLICATE_ITEM_CHECK)}
+    assert validator.failing_pages(report) == []